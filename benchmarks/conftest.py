@@ -0,0 +1,131 @@
+import os
+import shutil
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+# Row counts for the synthetic datasets, e.g. BENCH_ROWS=100000,1000000
+BENCH_ROWS = [int(n) for n in os.getenv("BENCH_ROWS", "100000").split(",") if n]
+
+CATEGORIES = ["fashion", "home_decor", "cosmetics"]
+
+
+def measure_peak(fn: Callable, *args, **kwargs) -> Tuple[object, float]:
+    """
+    Run fn under tracemalloc and return (result, peak MiB)
+    """
+    tracemalloc.start()
+    try:
+        result = fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1_048_576
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch) -> Path:
+    """
+    Empty project layout (data/, logs/) with the real templates, used as cwd
+    """
+    (tmp_path / "data").mkdir()
+    (tmp_path / "logs").mkdir()
+    shutil.copy(ROOT / "data" / "message_templates.json", tmp_path / "data" / "message_templates.json")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def no_delays(monkeypatch):
+    """
+    Skip the 30-90 s pause between messages and relogin backoff sleeps
+    """
+    from src.auth import instagram_client
+    from src.services.dm_sender import DMSender
+
+    monkeypatch.setattr(DMSender, "_random_delay", lambda self: None)
+    monkeypatch.setattr(instagram_client.time, "sleep", lambda seconds: None)
+
+
+def _write_users_csv(path: Path, rows: int) -> Path:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("username,category,status,followersCount\n")
+        f.writelines(
+            f"user_{i},{CATEGORIES[i % 3]},pending,{(i * 7919) % 1_000_000}\n" for i in range(rows)
+        )
+    return path
+
+
+def _write_category_dir(path: Path, rows: int) -> Path:
+    """
+    Scraper-style exports split over the known category keywords, with
+    about 10% usernames repeated across files
+    """
+    path.mkdir()
+    keywords = ["پیج-لباس", "لوازم خانگی", "محصولات بهداشتی"]
+    per_file = rows // len(keywords)
+    for n, keyword in enumerate(keywords):
+        with open(path / f"{keyword} {per_file} - dataset_synthetic.csv", "w", encoding="utf-8") as f:
+            f.write("username,id,followersCount\n")
+            for i in range(per_file):
+                user = i if i % 10 == 0 else n * per_file + i
+                f.write(f"User_{user},{user + 10**9},{(user * 7919) % 1_000_000}\n")
+    return path
+
+
+@pytest.fixture(scope="session")
+def users_csv_factory(tmp_path_factory) -> Callable[[int], Path]:
+    """
+    Synthetic users.csv files, generated once per size per session
+    """
+    cache = {}
+
+    def make(rows: int) -> Path:
+        if rows not in cache:
+            cache[rows] = _write_users_csv(tmp_path_factory.mktemp("users") / "users.csv", rows)
+        return cache[rows]
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def category_dir_factory(tmp_path_factory) -> Callable[[int], Path]:
+    cache = {}
+
+    def make(rows: int) -> Path:
+        if rows not in cache:
+            cache[rows] = _write_category_dir(tmp_path_factory.mktemp("exports") / "category", rows)
+        return cache[rows]
+
+    return make
+
+
+@pytest.fixture
+def fake_instagram():
+    """
+    Factory for an InstagramClient wired to the local fake backend
+    """
+    from fake_instagram import FakeInstagramBackend
+    from src.auth.instagram_client import InstagramClient
+    from src.auth.user_id_cache import UserIdCache
+
+    clients: List[InstagramClient] = []
+
+    def make(**backend_options) -> InstagramClient:
+        client = InstagramClient(UserIdCache("data/user_ids.db"))
+        client.client = FakeInstagramBackend(**backend_options)
+        client.username, client.password = "bench", "bench"
+        clients.append(client)
+        return client
+
+    yield make
+
+    for client in clients:
+        client.id_cache.close()
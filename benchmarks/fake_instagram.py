@@ -0,0 +1,79 @@
+"""
+Local stand-in for the subset of instagrapi.Client that InstagramClient uses.
+
+Latency and failures are injectable so the send pipeline can be measured
+without credentials or network access.
+"""
+import random
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from instagrapi.exceptions import ClientError, LoginRequired, UserNotFound
+
+
+class FakeInstagramBackend:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        missing_usernames: Iterable[str] = (),
+        session_valid: bool = True,
+        login_required: bool = False,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.missing_usernames = {username.lower() for username in missing_usernames}
+        self.session_valid = session_valid
+        self.login_required = login_required
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.sent: List[tuple] = []
+        self.settings: Dict = {"uuids": {"phone_id": "fake-phone"}}
+
+    def _call(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def login(self, username: Optional[str] = None, password: Optional[str] = None, **kwargs) -> bool:
+        self._call("login")
+        self.session_valid = True
+        return True
+
+    def logout(self) -> bool:
+        self._call("logout")
+        return True
+
+    def account_info(self) -> dict:
+        self._call("account_info")
+        if not self.session_valid:
+            raise LoginRequired("fake session expired")
+        return {"username": "fake"}
+
+    def get_settings(self) -> Dict:
+        return dict(self.settings)
+
+    def set_settings(self, settings: Dict) -> bool:
+        self.settings = dict(settings)
+        return True
+
+    def set_uuids(self, uuids: Dict) -> bool:
+        self.settings["uuids"] = dict(uuids)
+        return True
+
+    def user_id_from_username(self, username: str) -> str:
+        self._call("user_id_from_username")
+        if username.lower() in self.missing_usernames:
+            raise UserNotFound(f"fake: {username} not found")
+        return str(abs(hash(username.lower())) % 10**11)
+
+    def direct_send(self, text: str, user_ids: List[str]):
+        self._call("direct_send")
+        if self.login_required:
+            raise LoginRequired("fake login required")
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            raise ClientError("fake send failure")
+        self.sent.append((tuple(user_ids), len(text)))
+        return {"thread_id": "fake"}
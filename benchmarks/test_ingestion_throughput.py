@@ -0,0 +1,30 @@
+"""
+process_category_files throughput and peak memory on synthetic scraper
+exports, sized by BENCH_ROWS, parsing the CSVs and reading the warm
+column cache.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import BENCH_ROWS, measure_peak
+from src.utils.csv_processor import process_category_files
+
+
+@pytest.mark.parametrize("use_cache", [False, True], ids=["csv", "cached"])
+@pytest.mark.parametrize("rows", BENCH_ROWS, ids=lambda rows: f"{rows}-rows")
+def test_process_category_files(benchmark, category_dir_factory, workdir, rows, use_cache):
+    category_dir = category_dir_factory(rows)
+    output = workdir / "data" / "users.csv"
+    args = (str(output), str(category_dir))
+    kwargs = {"use_cache": use_cache}
+    if use_cache:
+        # Build the cache outside the measured rounds
+        assert process_category_files(*args, **kwargs)
+
+    assert benchmark.pedantic(process_category_files, args=args, kwargs=kwargs, rounds=3)
+
+    _, peak = measure_peak(process_category_files, *args, **kwargs)
+    benchmark.extra_info["peak_mib"] = round(peak, 1)
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_second"] = round(rows / benchmark.stats.stats.mean)
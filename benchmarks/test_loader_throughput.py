@@ -0,0 +1,64 @@
+"""
+UserLoader / user store throughput on synthetic users.csv files, sized by
+BENCH_ROWS (default 100k rows; e.g. BENCH_ROWS=100000,1000000).
+"""
+import shutil
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import BENCH_ROWS, measure_peak
+from src.data.user_loader import UserLoader
+
+
+@pytest.fixture(params=BENCH_ROWS, ids=lambda rows: f"{rows}-rows")
+def users_csv(request, users_csv_factory, workdir):
+    path = workdir / "data" / "users.csv"
+    shutil.copy(users_csv_factory(request.param), path)
+    return path
+
+
+def _fresh_loader(csv_path):
+    for suffix in (".db", ".db-wal", ".db-shm"):
+        csv_path.with_suffix(suffix).unlink(missing_ok=True)
+    return (UserLoader(str(csv_path)),), {}
+
+
+def test_import_csv(benchmark, users_csv):
+    def run(loader):
+        assert loader.import_csv()
+        loader.close()
+
+    benchmark.pedantic(run, setup=lambda: _fresh_loader(users_csv), rounds=3)
+
+
+def test_stream_pending_users(benchmark, users_csv):
+    loader = UserLoader(str(users_csv))
+    rows = len(loader.iter_users())
+
+    count = benchmark.pedantic(lambda: sum(1 for _ in loader.iter_users()), rounds=3)
+
+    _, peak = measure_peak(lambda: sum(1 for _ in loader.iter_users()))
+    benchmark.extra_info["peak_mib"] = round(peak, 1)
+    assert count == rows
+
+
+def test_load_users_list(benchmark, users_csv):
+    loader = UserLoader(str(users_csv))
+    loader.import_csv()
+
+    users = benchmark.pedantic(loader.load_users, rounds=3)
+
+    _, peak = measure_peak(loader.load_users)
+    benchmark.extra_info["peak_mib"] = round(peak, 1)
+    assert len(users) > 0
+
+
+def test_batched_status_updates(benchmark, users_csv):
+    loader = UserLoader(str(users_csv))
+    loader.import_csv()
+    updates = [(f"user_{i}", "success") for i in range(0, 10_000)]
+
+    changed = benchmark.pedantic(loader.update_user_statuses, args=(updates,), rounds=3)
+    assert changed == len(updates)
@@ -0,0 +1,57 @@
+"""
+Cost of the always-on timing spans, and the metrics a send run exports.
+"""
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.services.dm_sender import DMSender
+from src.services.rate_limiter import RateLimiter
+from src.services.send_journal import SendJournal
+from src.utils.metrics import Metrics, metrics
+
+
+def test_span_overhead(benchmark):
+    registry = Metrics()
+
+    def timed_noop():
+        with registry.span("noop"):
+            pass
+
+    benchmark(timed_noop)
+
+    assert registry.histograms["noop"].count > 0
+    # A span has to stay negligible next to a network call
+    if benchmark.stats:
+        assert benchmark.stats["mean"] < 50e-6
+
+
+def test_send_run_exports_metrics(workdir, no_delays, fake_instagram):
+    metrics.reset()
+    client = fake_instagram(failure_rate=0.3, missing_usernames={"user_0"})
+    sender = DMSender(
+        client,
+        "data/message_templates.json",
+        rate_limiter=RateLimiter(daily_limit=10**9),
+        journal=SendJournal(fsync=False)
+    )
+    assert client.login()
+    for i in range(20):
+        sender.send_message({"username": f"user_{i}", "category": "fashion"})
+    sender.close()
+    metrics.export()
+
+    with open("logs/metrics.json", encoding="utf-8") as f:
+        data = json.load(f)
+
+    for stage in ("login", "resolve_user_id", "direct_send", "send_dm", "render_template", "log_write"):
+        assert data["stages"][stage]["count"] > 0
+    assert data["stages"]["send_dm"]["count"] == 20
+    assert data["events"]["messages_sent"] + data["events"]["messages_failed"] == 20
+    assert any(error["stage"] == "send_dm" and error["error"] == "UserNotFound" for error in data["errors"])
+
+    prometheus = open("logs/metrics.prom", encoding="utf-8").read()
+    assert 'dm_stage_duration_seconds_count{stage="send_dm"} 20' in prometheus
+    assert 'dm_stage_duration_seconds_bucket{stage="send_dm",le="+Inf"} 20' in prometheus
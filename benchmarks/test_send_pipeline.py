@@ -0,0 +1,76 @@
+"""
+Per-user overhead of DMSender.send_message against the fake backend, with
+the random delay disabled: template pick and render, ID resolution (cached
+or not), the send call, rate limiter update and journal write.
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from src.services.dm_sender import DMSender
+from src.services.rate_limiter import RateLimiter
+from src.services.send_journal import SendJournal
+
+
+@pytest.fixture
+def make_sender(workdir, no_delays, fake_instagram):
+    senders = []
+
+    def make(fsync: bool = False, **backend_options) -> DMSender:
+        client = fake_instagram(**backend_options)
+        sender = DMSender(
+            client,
+            "data/message_templates.json",
+            rate_limiter=RateLimiter(daily_limit=10**9),
+            journal=SendJournal(flush_every=1, fsync=fsync)
+        )
+        senders.append(sender)
+        return sender
+
+    yield make
+
+    for sender in senders:
+        sender.close()
+
+
+@pytest.mark.parametrize("fsync", [False, True], ids=["no-fsync", "fsync"])
+def test_send_message_cached_id(benchmark, make_sender, fsync):
+    sender = make_sender(fsync=fsync)
+    user = {"username": "user_1", "category": "fashion"}
+
+    assert benchmark(sender.send_message, user)
+    # The ID is resolved once, then served from the cache
+    assert sender.client.client.calls["user_id_from_username"] == 1
+
+
+def test_send_message_uncached_ids(benchmark, make_sender):
+    sender = make_sender()
+    counter = iter(range(10**9))
+
+    def send_new_user():
+        return sender.send_message({"username": f"user_{next(counter)}", "category": "home_decor"})
+
+    assert benchmark(send_new_user)
+
+
+def test_send_message_with_latency_and_failures(benchmark, make_sender):
+    sender = make_sender(latency=0.002, failure_rate=0.2)
+    users = [{"username": f"user_{i}", "category": "cosmetics"} for i in range(50)]
+
+    results = benchmark.pedantic(lambda: [sender.send_message(user) for user in users], rounds=3)
+
+    benchmark.extra_info["failures"] = results.count(False)
+    assert 0 < results.count(False) < len(users)
+
+
+def test_expired_session_retries_are_bounded(benchmark, make_sender):
+    sender = make_sender(login_required=True)
+    sender.client.max_retries = 3
+
+    result = benchmark.pedantic(sender.client.send_dm, args=("user_1", "hello"), rounds=20)
+    assert result is False
+
+    # Counted on a single call, since --benchmark-disable runs just one round
+    sender.client.client.calls.clear()
+    assert sender.client.send_dm("user_1", "hello") is False
+    assert sender.client.client.calls["login"] == 3
@@ -0,0 +1,64 @@
+"""
+Cold-start budget for the CLI.
+
+Runs `python -X importtime` in a fresh interpreter and fails when importing
+main.py pulls in heavy dependencies or exceeds STARTUP_BUDGET_MS.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Generous enough for slow CI machines; pandas + instagrapi alone take ~1s
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "300"))
+
+HEAVY_MODULES = ["pandas", "numpy", "instagrapi", "pydantic", "sqlite3"]
+
+
+def _run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+
+def _import_time_ms(module: str) -> float:
+    """
+    Cumulative import time of a module as reported by -X importtime
+    """
+    result = _run_python(f"import {module}", "-X", "importtime")
+    for line in reversed(result.stderr.splitlines()):
+        _, _, cumulative, name = [part.strip() for part in line.replace(":", "|", 1).split("|")]
+        if name == module:
+            return int(cumulative) / 1000
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+def test_main_import_skips_heavy_dependencies():
+    code = "import sys, main; print(','.join(m for m in %r if m in sys.modules))" % HEAVY_MODULES
+    loaded = _run_python(code).stdout.strip()
+    assert loaded == "", f"main.py imports heavy modules at startup: {loaded}"
+
+
+def test_main_import_within_budget(record_property):
+    # Best of a few runs to smooth out filesystem cache noise
+    timings = [_import_time_ms("main") for _ in range(3)]
+    best = min(timings)
+    record_property("main_import_ms", best)
+    assert best < STARTUP_BUDGET_MS
+
+
+# Commands that do not set up the file logger, so running them leaves logs/ untouched
+@pytest.mark.parametrize("command", [["--help"], ["clear-logs", "--help"]])
+def test_light_command_help_runs(command):
+    result = subprocess.run(
+        [sys.executable, "main.py", *command], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
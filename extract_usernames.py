@@ -1,17 +1,17 @@
-import pandas as pd
-import os
+from src.utils.column_cache import CACHE_DIR_NAME, ColumnCache
+from src.utils.csv_processor import CATEGORY_DIR, discover_category_files
 
 def extract_usernames():
-    category_dir = 'category'
-    for file in os.listdir(category_dir):
-        if file.endswith('.csv'):
-            # Read the CSV file
-            df = pd.read_csv(os.path.join(category_dir, file))
-            # Create new file with only usernames
-            usernames_df = df[['username']]
-            new_filename = f'usernames_{file}'
-            usernames_df.to_csv(os.path.join(category_dir, new_filename), index=False)
-            print(f"Processed {file} -> {new_filename}")
+    # Columns are cached once per export instead of copied to another CSV;
+    # readers use iter_category_chunks(file_path, ['username'])
+    for file_path, _ in discover_category_files(CATEGORY_DIR):
+        cache = ColumnCache(file_path.parent / CACHE_DIR_NAME)
+        if cache.is_fresh(file_path):
+            print(f"Up to date: {file_path.name} ({cache.rows(file_path)} usernames)")
+        elif cache.build(file_path):
+            print(f"Cached {file_path.name} ({cache.rows(file_path)} usernames) -> {cache.path_for(file_path)}")
+        else:
+            print(f"Failed to cache {file_path.name}")
 
 if __name__ == "__main__":
-    extract_usernames() 
\ No newline at end of file
+    extract_usernames()
@@ -1,36 +1,65 @@
 import typer
 from rich.console import Console
-from rich.progress import Progress
 from pathlib import Path
 from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Iterable
+import logging
 import os
+import time
 
-from src.auth.instagram_client import InstagramClient
-from src.data.user_loader import UserLoader
-from src.services.dm_sender import DMSender
-from src.utils.logger import setup_logger
-from src.utils.csv_processor import process_category_files
+# Heavy dependencies (pandas, instagrapi) are imported inside the commands
+# that need them so light commands start quickly
+if TYPE_CHECKING:
+    import pandas as pd
+    from rich.table import Table
+    from src.auth.user_id_cache import UserIdCache
+    from src.data.message_templates import MessageTemplates
+    from src.data.user_loader import UserLoader
 
 # Initialize Typer app
 app = typer.Typer(help="Instagram DM Automation Tool")
 console = Console()
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger("instagram_dm_automation")
 
-# Setup logger
-logger = setup_logger()
+@app.callback()
+def init(ctx: typer.Context):
+    # Load environment variables
+    load_dotenv()
+
+    # Setup logger (clear-logs deletes app.log, so it must not hold it open)
+    if ctx.invoked_subcommand != "clear-logs":
+        from src.utils.logger import setup_logger
+        setup_logger()
 
 @app.command()
 def process_categories(
-    output_file: str = typer.Option("data/users.csv", help="Path to output CSV file")
+    output_file: str = typer.Option("data/users.csv", help="Path to output CSV file"),
+    category_dir: str = typer.Option("category", help="Directory containing scraper CSV exports"),
+    chunk_size: int = typer.Option(50_000, help="Rows read per chunk"),
+    measure_memory: bool = typer.Option(False, help="Log peak memory used during ingestion"),
+    opt_out_file: str = typer.Option("data/opt_out.txt", help="Usernames that must never be messaged"),
+    bloom_suppression: bool = typer.Option(False, help="Hold the suppression list in a Bloom filter (for very large lists)"),
+    use_cache: bool = typer.Option(True, "--cache/--no-cache", help="Read exports through their columnar cache (built on first use)")
 ):
     """
     Process category CSV files and combine them into a single users file
     """
+    from src.auth.user_id_cache import UserIdCache
+    from src.data.suppression import SuppressionIndex
+    from src.utils.csv_processor import process_category_files
+
     try:
-        if process_category_files(output_file):
-            console.print(f"[green]Successfully processed category files to {output_file}[/green]")
+        suppression = SuppressionIndex(opt_out_file=opt_out_file, use_bloom=bloom_suppression).load()
+        suppression.add(UserIdCache().missing_usernames())
+        summary = process_category_files(output_file, category_dir, chunk_size, measure_memory, suppression, use_cache)
+        if summary:
+            console.print(
+                f"[green]Successfully processed {summary['files']} category files to {output_file}: "
+                f"{summary['users']} users from {summary['rows']} rows[/green]"
+            )
+            if "peak_mib" in summary:
+                console.print(f"Peak memory during ingestion: {summary['peak_mib']:.1f} MiB")
         else:
             console.print("[red]Failed to process category files[/red]")
             raise typer.Exit(1)
@@ -40,86 +69,379 @@ def process_categories(
         console.print(f"[red]Error: {str(e)}[/red]")
         raise typer.Exit(1)
 
+def _create_user_loader(users_file: str, opt_out_file: str, bloom_suppression: bool, id_cache: "UserIdCache") -> "UserLoader":
+    """
+    Create a user loader that drops already contacted, opted-out and known-missing users
+    """
+    from src.data.suppression import SuppressionIndex
+    from src.data.user_loader import UserLoader
+
+    suppression = SuppressionIndex(opt_out_file=opt_out_file, use_bloom=bloom_suppression).load()
+    missing_usernames = id_cache.missing_usernames()
+    if missing_usernames:
+        console.print(f"[yellow]Skipping {len(missing_usernames)} usernames known not to exist[/yellow]")
+    suppression.add(missing_usernames)
+
+    return UserLoader(users_file, suppression=suppression)
+
+def _report_template_problems(templates: "MessageTemplates", categories: Iterable[str], columns: Iterable[str]) -> None:
+    for problem in templates.validate(categories, columns):
+        console.print(f"[yellow]Warning: {problem}[/yellow]")
+
+def _write_preview(users: list, templates_file: str, output_file: str) -> None:
+    """
+    Render every user's message in one batch and write them to a CSV file
+    """
+    import pandas as pd
+    from src.data.message_templates import MessageTemplates
+
+    started = time.perf_counter()
+    templates = MessageTemplates.load(templates_file)
+    users_df = pd.DataFrame(users)
+    _report_template_problems(templates, users_df["category"].dropna().unique(), users_df.columns)
+
+    rendered = templates.render_all(users_df)
+    output_path = Path(output_file)
+    output_path.parent.mkdir(exist_ok=True)
+    rendered.to_csv(output_path, index=False)
+
+    without_template = int(rendered["message"].isna().sum())
+    console.print(
+        f"[green]Rendered {len(rendered) - without_template} messages to {output_path} "
+        f"in {time.perf_counter() - started:.2f}s[/green]"
+    )
+    if without_template:
+        console.print(f"[yellow]{without_template} users have no template for their category[/yellow]")
+
 @app.command()
 def send_messages(
     users_file: str = typer.Option("data/users.csv", help="Path to users CSV file"),
     templates_file: str = typer.Option("data/message_templates.json", help="Path to message templates JSON file"),
-    dry_run: bool = typer.Option(False, help="Run without sending actual messages")
+    dry_run: bool = typer.Option(False, help="Render messages to --preview-file instead of sending them (no login)"),
+    preview_file: str = typer.Option("logs/preview.csv", help="Output file for --dry-run"),
+    opt_out_file: str = typer.Option("data/opt_out.txt", help="Usernames that must never be messaged"),
+    bloom_suppression: bool = typer.Option(False, help="Hold the suppression list in a Bloom filter (for very large lists)"),
+    resume: bool = typer.Option(False, help="Continue the last unfinished run from its checkpoint"),
+    run_id: str = typer.Option(None, help="Run to continue with --resume (defaults to the most recent unfinished one)"),
+    checkpoint_every: int = typer.Option(10, help="Users processed between status checkpoints")
 ):
     """
     Start sending DMs to users from the specified CSV file
     """
+    from rich.progress import Progress
+    from src.auth.instagram_client import InstagramClient
+    from src.auth.user_id_cache import UserIdCache
+    from src.services.dm_sender import DMSender
+    from src.services.rate_limiter import RateLimiter
+    from src.utils.metrics import metrics
+
     try:
-        # Initialize components
-        client = InstagramClient()
-        user_loader = UserLoader(users_file)
-        dm_sender = DMSender(client, templates_file)
+        id_cache = UserIdCache()
+        user_loader = _create_user_loader(users_file, opt_out_file, bloom_suppression, id_cache)
 
-        # Load users
-        users = user_loader.load_users()
-        
-        if not users:
+        # Pick up where an earlier run stopped
+        cursor = 0
+        if resume and not dry_run:
+            run = user_loader.get_run(run_id)
+            if not run:
+                console.print("[red]No unfinished run to resume[/red]")
+                raise typer.Exit(1)
+            run_id, cursor = run["run_id"], run["cursor"]
+            console.print(f"[green]Resuming run {run_id} after {run['processed']} processed users[/green]")
+
+        if dry_run:
+            users = user_loader.load_users(after_id=cursor)
+            if not users:
+                console.print("[red]No users found in the CSV file[/red]")
+                raise typer.Exit(1)
+
+            console.print(f"[green]Found {len(users)} users to process[/green]")
+            console.print("[yellow]Running in dry-run mode - no messages will be sent[/yellow]")
+            _write_preview(users, templates_file, preview_file)
+            return
+
+        # Stream users instead of holding the whole list for the entire run
+        # Suppressed users are written back as "suppressed" while streaming
+        users = user_loader.iter_users(after_id=cursor, mark_suppressed=True)
+        if users is None:
+            console.print(f"[red]Failed to load users from {users_file}[/red]")
+            raise typer.Exit(1)
+
+        if users.peek() is None:
+            # Everyone left is suppressed; read them once so they are marked
+            for _ in users:
+                pass
+            if resume:
+                user_loader.checkpoint(run_id, cursor, [], "completed")
+                console.print(f"[green]Run {run_id} has no users left, marked as completed[/green]")
+                return
             console.print("[red]No users found in the CSV file[/red]")
             raise typer.Exit(1)
 
+        console.print(f"[green]Found {len(users)} pending users to process[/green]")
+
+        # Initialize components
+        client = InstagramClient(id_cache)
+        rate_limiter = RateLimiter()
+        dm_sender = DMSender(client, templates_file, rate_limiter)
+        _report_template_problems(dm_sender.templates, *user_loader.get_pending_profile(after_id=cursor))
+
+        if not rate_limiter.can_send():
+            console.print(f"[yellow]Daily limit of {rate_limiter.daily_limit} messages already reached[/yellow]")
+            return
+
         # Login to Instagram
         if not client.login():
+            metrics.export()
             console.print("[red]Failed to login to Instagram[/red]")
             raise typer.Exit(1)
 
-        console.print(f"[green]Found {len(users)} users to process[/green]")
-        
-        if dry_run:
-            console.print("[yellow]Running in dry-run mode - no messages will be sent[/yellow]")
+        if not resume:
+            run_id = user_loader.start_run()
+            if not run_id:
+                console.print("[red]Failed to start a new run[/red]")
+                raise typer.Exit(1)
+        dm_sender.run_id = run_id
+
+        console.print(f"[green]Run {run_id}: {rate_limiter.remaining()} of {rate_limiter.daily_limit} daily messages remaining[/green]")
 
-        # Process users
-        with Progress() as progress:
-            task = progress.add_task("[cyan]Sending messages...", total=len(users))
-            
-            for user in users:
-                try:
-                    if not dry_run:
+        # Process users, writing statuses back in batches with the run cursor
+        updates = []
+        run_status = "interrupted"
+        try:
+            with Progress() as progress:
+                task = progress.add_task("[cyan]Sending messages...", total=len(users))
+
+                for user in users:
+                    if not rate_limiter.can_send():
+                        console.print(f"[yellow]Daily limit of {rate_limiter.daily_limit} messages reached, stopping[/yellow]")
+                        run_status = "paused"
+                        break
+
+                    try:
                         success = dm_sender.send_message(user)
                         status = "[green]Success[/green]" if success else "[red]Failed[/red]"
-                    else:
-                        # Get template for category
-                        template1 = dm_sender._get_template(user["category"], "template_1")
-                        template2 = dm_sender._get_template(user["category"], "template_2")
-                        
-                        if template1 and template2:
-                            console.print(f"\n[bold]Processing {user['username']} ({user['category']}):[/bold]")
-                            console.print("[cyan]Message 1:[/cyan]")
-                            console.print(template1["text"])
-                            console.print("\n[cyan]Message 2:[/cyan]")
-                            console.print(template2["text"])
-                            console.print("---")
-                        status = "[yellow]Dry run[/yellow]"
-                    
-                    console.print(f"Processing {user['username']}: {status}")
-                except Exception as e:
-                    logger.error(f"Error processing user {user['username']}: {str(e)}")
-                    console.print(f"[red]Error processing {user['username']}: {str(e)}[/red]")
-                
-                progress.advance(task)
+                        console.print(f"Processing {user['username']}: {status}")
+                    except Exception as e:
+                        success = False
+                        logger.error(f"Error processing user {user['username']}: {str(e)}")
+                        console.print(f"[red]Error processing {user['username']}: {str(e)}[/red]")
+
+                    updates.append((user["username"], "success" if success else "failed"))
+                    cursor = user.row_id
+                    if len(updates) >= checkpoint_every:
+                        user_loader.checkpoint(run_id, cursor, updates)
+                        updates = []
+
+                    # Suppressed users are skipped by the stream but still count as done
+                    progress.update(task, completed=users.consumed)
+                else:
+                    run_status = "completed"
 
+        finally:
+            user_loader.checkpoint(run_id, cursor, updates, run_status)
+            dm_sender.close()
+            metrics.export()
+
+        if run_status != "completed":
+            console.print(f"[yellow]Run {run_id} {run_status}, continue it with --resume[/yellow]")
+
+    except KeyboardInterrupt:
+        if run_id:
+            console.print(f"[yellow]Interrupted, continue run {run_id} with --resume[/yellow]")
+        raise typer.Exit(130)
+    except typer.Exit:
+        raise
     except Exception as e:
         logger.error(f"Application error: {str(e)}")
         console.print(f"[red]Error: {str(e)}[/red]")
         raise typer.Exit(1)
 
 @app.command()
-def show_stats():
+def preview(
+    users_file: str = typer.Option("data/users.csv", help="Path to users CSV file"),
+    templates_file: str = typer.Option("data/message_templates.json", help="Path to message templates JSON file"),
+    output_file: str = typer.Option("logs/preview.csv", help="Where to write the rendered messages"),
+    opt_out_file: str = typer.Option("data/opt_out.txt", help="Usernames that must never be messaged"),
+    bloom_suppression: bool = typer.Option(False, help="Hold the suppression list in a Bloom filter (for very large lists)")
+):
+    """
+    Render the message for every pending user to a CSV file without logging in
+    """
+    from src.auth.user_id_cache import UserIdCache
+
+    try:
+        users = _create_user_loader(users_file, opt_out_file, bloom_suppression, UserIdCache()).load_users()
+        if not users:
+            console.print("[red]No users found in the CSV file[/red]")
+            raise typer.Exit(1)
+
+        _write_preview(users, templates_file, output_file)
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Error in preview: {str(e)}")
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+@app.command()
+def export_users(
+    users_file: str = typer.Option("data/users.csv", help="Path to users CSV file"),
+    output_file: str = typer.Option(None, help="Export destination (defaults to the users CSV file)")
+):
+    """
+    Write current user statuses from the user store back to CSV
+    """
+    from src.data.user_loader import UserLoader
+
+    try:
+        user_loader = UserLoader(users_file)
+        if not user_loader.export_csv(output_file):
+            console.print("[red]Failed to export users[/red]")
+            raise typer.Exit(1)
+
+        console.print(f"[green]Exported users to {output_file or users_file}[/green]")
+        for status, count in sorted(user_loader.get_user_count().items()):
+            console.print(f"  {status}: {count}")
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Error in export_users: {str(e)}")
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+@app.command()
+def export_sent_log(
+    output_file: str = typer.Option("logs/sent_log.rebuilt.csv", help="CSV file to write"),
+    force: bool = typer.Option(False, help="Overwrite output_file if it already exists")
+):
+    """
+    Rebuild a sent log CSV from the send journal
+
+    The journal only holds attempts made since it was introduced, so the
+    result is written next to the live logs/sent_log.csv, not over it.
+    """
+    from src.services.send_journal import SendJournal
+
+    try:
+        if Path(output_file).exists() and not force:
+            console.print(f"[red]{output_file} already exists, pass --force to overwrite it[/red]")
+            raise typer.Exit(1)
+
+        count = SendJournal(csv_file=None).export_csv(output_file)
+        console.print(f"[green]Exported {count} attempts to {output_file}[/green]")
+
+    except typer.Exit:
+        raise
+    except Exception as e:
+        logger.error(f"Error in export_sent_log: {str(e)}")
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+def _status_table(title: str, label: str, rows: dict) -> "Table":
+    """
+    Build a success/failure table from {name: {status: count}} rollups
+    """
+    from rich.table import Table
+
+    table = Table(title=title)
+    table.add_column(label)
+    table.add_column("Success", justify="right", style="green")
+    table.add_column("Failed", justify="right", style="red")
+    table.add_column("Success rate", justify="right")
+
+    for name, counts in sorted(rows.items()):
+        success = counts.get("success", 0)
+        total = sum(counts.values())
+        table.add_row(name, str(success), str(total - success), f"{success / total:.0%}" if total else "-")
+
+    return table
+
+def _print_metrics(metrics_file: Path) -> None:
+    """
+    Show stage latencies and error counters exported by the last run
+    """
+    import json
+    from rich.table import Table
+
+    with open(metrics_file, encoding="utf-8") as f:
+        data = json.load(f)
+
+    def ms(value) -> str:
+        return f"{value:,.1f}" if value is not None else "-"
+
+    latency_table = Table(title=f"Last run latencies ({data['started_at']})")
+    latency_table.add_column("Stage")
+    latency_table.add_column("Count", justify="right")
+    for column in ("Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"):
+        latency_table.add_column(column, justify="right")
+
+    for stage, hist in data["stages"].items():
+        mean = hist["sum_ms"] / hist["count"] if hist["count"] else None
+        latency_table.add_row(
+            stage, str(hist["count"]), ms(mean),
+            ms(hist["p50_ms"]), ms(hist["p95_ms"]), ms(hist["p99_ms"]), ms(hist["max_ms"])
+        )
+    console.print(latency_table)
+
+    if data["errors"]:
+        errors_table = Table(title="Last run errors")
+        errors_table.add_column("Stage")
+        errors_table.add_column("Error")
+        errors_table.add_column("Count", justify="right")
+        for error in data["errors"]:
+            errors_table.add_row(error["stage"], error["error"], str(error["count"]))
+        console.print(errors_table)
+
+    if data["events"]:
+        console.print("  ".join(f"{name}: {count}" for name, count in data["events"].items()))
+
+@app.command()
+def show_stats(
+    days: int = typer.Option(14, help="Number of most recent days to show")
+):
     """
     Display sending statistics from the logs
     """
+    from rich.table import Table
+    from src.services.stats import SentLogStats
+
     try:
         log_file = Path("logs/sent_log.csv")
         if not log_file.exists():
             console.print("[yellow]No statistics available yet[/yellow]")
             return
 
-        # TODO: Implement statistics display
-        console.print("[green]Statistics feature coming soon![/green]")
+        stats = SentLogStats(str(log_file)).refresh()
+        if not stats["total"]:
+            console.print("[yellow]No statistics available yet[/yellow]")
+            return
+
+        success = stats["by_status"].get("success", 0)
+        console.print(
+            f"[bold]Total attempts:[/bold] {stats['total']}  "
+            f"[green]success: {success}[/green]  "
+            f"[red]failed: {stats['total'] - success}[/red]  "
+            f"success rate: {success / stats['total']:.1%}"
+        )
+
+        recent_days = dict(sorted(stats["by_day"].items())[-days:])
+        console.print(_status_table("Per day", "Day", recent_days))
+        console.print(_status_table("Per category", "Category", stats["by_category"]))
+
+        if stats["errors"]:
+            errors_table = Table(title="Errors")
+            errors_table.add_column("Error")
+            errors_table.add_column("Count", justify="right")
+            for error, count in sorted(stats["errors"].items(), key=lambda item: -item[1]):
+                errors_table.add_row(error, str(count))
+            console.print(errors_table)
+
+        metrics_file = Path("logs/metrics.json")
+        if metrics_file.exists():
+            _print_metrics(metrics_file)
 
     except Exception as e:
         console.print(f"[red]Error showing statistics: {str(e)}[/red]")
@@ -130,10 +452,13 @@ def test_connection():
     """
     Test Instagram connection and authentication
     """
+    from src.auth.instagram_client import InstagramClient
+
     try:
         client = InstagramClient()
         if client.login():
             console.print("[green]Successfully connected to Instagram![/green]")
+            console.print(f"Logged in via {client.login_path} in {client.login_seconds:.2f}s")
         else:
             console.print("[red]Failed to connect to Instagram[/red]")
             raise typer.Exit(1)
@@ -148,7 +473,8 @@ def clear_logs():
     Clear log files
     """
     try:
-        log_files = ["logs/app.log", "logs/sent_log.csv"]
+        log_files = ["logs/app.log", "logs/sent_log.csv", "logs/send_journal.jsonl", "logs/stats_cache.json",
+                     "logs/metrics.json", "logs/metrics.prom"]
         for file in log_files:
             if os.path.exists(file):
                 os.remove(file)
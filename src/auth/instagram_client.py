@@ -4,23 +4,43 @@ import json
 from pathlib import Path
 from typing import Optional
 from instagrapi import Client
-from instagrapi.exceptions import LoginRequired, ClientError
+from instagrapi.exceptions import LoginRequired, ClientError, UserNotFound
 import logging
 
+from src.auth.user_id_cache import UserIdCache
+from src.utils.atomic import atomic_write_text
+from src.utils.metrics import metrics
+
+# Upper bound for the wait before a relogin attempt
+MAX_BACKOFF_SECONDS = 300
+
 class InstagramClient:
-    def __init__(self):
+    def __init__(self, id_cache: Optional[UserIdCache] = None):
         self.client = Client()
         self.username = os.getenv("IG_USERNAME")
         self.password = os.getenv("IG_PASSWORD")
         self.session_file = Path("data/session.json")
+        self.id_cache = id_cache or UserIdCache()
+        self.max_retries = int(os.getenv("MAX_RETRIES", "5"))
+        self.retry_backoff = float(os.getenv("RELOGIN_BACKOFF_SECONDS", "5"))
+        self.login_path: Optional[str] = None
+        self.login_seconds: Optional[float] = None
+        self.last_error: Optional[Exception] = None
         self.logger = logging.getLogger(__name__)
 
-    def login(self) -> bool:
+    def login(self, use_session: bool = True) -> bool:
         """
         Login to Instagram using stored session or credentials
+
+        A saved session is reused after validating it with a single cheap
+        request; credentials are only sent when that fails. The path taken
+        and the time it took are kept in login_path and login_seconds.
         """
+        started = time.perf_counter()
+        self.login_path = None
         try:
-            if self._load_session():
+            if use_session and self._load_session():
+                self.login_path = "session"
                 self.logger.info("Logged in using saved session")
                 return True
 
@@ -29,75 +49,134 @@ class InstagramClient:
                 return False
 
             self.logger.info("Logging in with credentials...")
-            self.client.login(self.username, self.password)
+            self._login_with_credentials()
             self._save_session()
+            self.login_path = "credentials"
             return True
 
         except Exception as e:
+            metrics.error("login", type(e).__name__)
             self.logger.error(f"Login failed: {str(e)}")
             return False
 
+        finally:
+            self.login_seconds = time.perf_counter() - started
+            metrics.observe("login", self.login_seconds * 1000)
+            if self.login_path:
+                metrics.event(f"login_{self.login_path}")
+
     def send_dm(self, username: str, message: str) -> bool:
         """
         Send a direct message to a user
+
+        An expired session triggers a fresh login with exponential backoff,
+        at most max_retries times. The reason for a failure is kept in
+        last_error.
         """
-        try:
-            # Get user ID from username
-            user_id = self.client.user_id_from_username(username)
-            if not user_id:
-                self.logger.error(f"Could not find user ID for username: {username}")
+        self.last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Get user ID from username
+                user_id = self.resolve_user_id(username)
+                if not user_id:
+                    self.last_error = UserNotFound(f"Could not find user ID for username: {username}")
+                    self.logger.error(str(self.last_error))
+                    return False
+
+                # Send the message
+                with metrics.span("direct_send"):
+                    self.client.direct_send(message, [user_id])
+                self.logger.info(f"Successfully sent message to {username}")
+                return True
+
+            except LoginRequired as e:
+                self.last_error = e
+                if attempt == self.max_retries:
+                    self.logger.error(f"Session expired, giving up on {username} after {attempt} relogin attempts")
+                    return False
+
+                metrics.event("relogin")
+                delay = min(self.retry_backoff * 2 ** attempt, MAX_BACKOFF_SECONDS)
+                self.logger.error(f"Session expired, attempting to relogin in {delay:.0f}s...")
+                time.sleep(delay)
+                if not self.login(use_session=False):
+                    return False
+
+            except ClientError as e:
+                self.last_error = e
+                self.logger.error(f"Failed to send message to {username}: {str(e)}")
                 return False
 
-            # Send the message
-            self.client.direct_send(message, [user_id])
-            self.logger.info(f"Successfully sent message to {username}")
-            return True
+            except Exception as e:
+                self.last_error = e
+                self.logger.error(f"Unexpected error sending message to {username}: {str(e)}")
+                return False
 
-        except LoginRequired:
-            self.logger.error("Session expired, attempting to relogin...")
-            if self.login():
-                return self.send_dm(username, message)
-            return False
+        return False
 
-        except ClientError as e:
-            self.logger.error(f"Failed to send message to {username}: {str(e)}")
-            return False
+    def resolve_user_id(self, username: str) -> Optional[str]:
+        """
+        Get the user ID for a username, using the cache before the API
+        """
+        hit, user_id = self.id_cache.get(username)
+        if hit:
+            metrics.event("user_id_cache_hit")
+            return user_id
 
-        except Exception as e:
-            self.logger.error(f"Unexpected error sending message to {username}: {str(e)}")
-            return False
+        metrics.event("user_id_cache_miss")
+        try:
+            with metrics.span("resolve_user_id"):
+                user_id = self.client.user_id_from_username(username)
+        except UserNotFound:
+            user_id = None
+
+        self.id_cache.put(username, user_id)
+        return user_id
 
     def _load_session(self) -> bool:
         """
-        Load saved session data
+        Load saved session data and check that it is still valid
         """
         try:
-            if not self.session_file.exists():
+            if not self.session_file.exists() or self.session_file.stat().st_size == 0:
                 return False
 
             with open(self.session_file) as f:
                 session_data = json.load(f)
 
             self.client.set_settings(session_data)
-            self.client.login(self.username, self.password)
+
+            # One lightweight request instead of a full login
+            self.client.account_info()
             return True
 
+        except LoginRequired:
+            self.logger.info("Saved session has expired")
+            return False
+
         except Exception as e:
             self.logger.error(f"Failed to load session: {str(e)}")
             return False
 
+    def _login_with_credentials(self) -> None:
+        """
+        Full login, keeping the device identifiers of any previous session
+        """
+        old_settings = self.client.get_settings()
+        self.client.set_settings({})
+        if old_settings.get("uuids"):
+            self.client.set_uuids(old_settings["uuids"])
+        self.client.login(self.username, self.password)
+
     def _save_session(self) -> None:
         """
         Save current session data
         """
         try:
             session_data = self.client.get_settings()
-            
-            # Ensure the data directory exists
-            self.session_file.parent.mkdir(exist_ok=True)
-            
-            with open(self.session_file, "w") as f:
-                json.dump(session_data, f)
+
+            # Write to a temporary file first so a crash never leaves a torn session
+            atomic_write_text(self.session_file, json.dumps(session_data))
             
             self.logger.info("Session saved successfully")
 
@@ -0,0 +1,134 @@
+import sqlite3
+import logging
+import time
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+from src.utils.sqlite_db import open_wal_connection
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_ids (
+    username TEXT PRIMARY KEY,
+    user_id TEXT,
+    resolved_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_user_ids_last_used ON user_ids (last_used);
+"""
+
+# Evict least recently used entries after this many inserts
+EVICT_EVERY = 100
+
+
+class UserIdCache:
+    """
+    Disk-backed username -> user_id cache with TTL and LRU eviction.
+
+    Usernames that do not exist are cached too (user_id is NULL) with a
+    shorter TTL, so dead accounts are not looked up again on every run.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/user_ids.db",
+        ttl_seconds: int = 30 * 24 * 3600,
+        negative_ttl_seconds: int = 24 * 3600,
+        max_entries: int = 100_000
+    ):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_wal_connection(self.db_path, SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get(self, username: str) -> Tuple[bool, Optional[str]]:
+        """
+        Look up a username, returns (hit, user_id); user_id is None for a
+        cached "does not exist" entry
+        """
+        try:
+            key = username.lower()
+            row = self.conn.execute(
+                "SELECT user_id, resolved_at FROM user_ids WHERE username = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+
+            user_id, resolved_at = row
+            ttl = self.ttl_seconds if user_id is not None else self.negative_ttl_seconds
+            now = time.time()
+            if now - resolved_at > ttl:
+                return False, None
+
+            with self.conn:
+                self.conn.execute("UPDATE user_ids SET last_used = ? WHERE username = ?", (now, key))
+            return True, user_id
+
+        except Exception as e:
+            self.logger.error(f"Error reading user id cache: {str(e)}")
+            return False, None
+
+    def put(self, username: str, user_id: Optional[str]) -> None:
+        """
+        Store a resolved user_id, or None to remember that the username does not exist
+        """
+        try:
+            now = time.time()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO user_ids (username, user_id, resolved_at, last_used) "
+                    "VALUES (?, ?, ?, ?)",
+                    (username.lower(), user_id, now, now)
+                )
+
+            self._inserts += 1
+            if self._inserts % EVICT_EVERY == 0:
+                self.evict()
+
+        except Exception as e:
+            self.logger.error(f"Error writing user id cache: {str(e)}")
+
+    def evict(self) -> int:
+        """
+        Drop expired entries and the least recently used ones above max_entries
+        """
+        now = time.time()
+        with self.conn:
+            expired = self.conn.execute(
+                "DELETE FROM user_ids WHERE resolved_at < ? OR (user_id IS NULL AND resolved_at < ?)",
+                (now - self.ttl_seconds, now - self.negative_ttl_seconds)
+            ).rowcount
+            overflow = self.conn.execute(
+                "DELETE FROM user_ids WHERE username IN ("
+                "SELECT username FROM user_ids ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        return expired + overflow
+
+    def missing_usernames(self) -> Set[str]:
+        """
+        Usernames currently cached as not existing
+        """
+        try:
+            cursor = self.conn.execute(
+                "SELECT username FROM user_ids WHERE user_id IS NULL AND resolved_at >= ?",
+                (time.time() - self.negative_ttl_seconds,)
+            )
+            return {row[0] for row in cursor}
+
+        except Exception as e:
+            self.logger.error(f"Error reading user id cache: {str(e)}")
+            return set()
@@ -0,0 +1,161 @@
+import json
+import random
+import re
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+class _KeepMissing(dict):
+    """
+    Leaves unknown placeholders in place, like the old str.replace formatting
+    """
+
+    def __missing__(self, key: str) -> str:
+        return f"{{{key}}}"
+
+
+class CompiledTemplate:
+    """
+    A message template turned into a format string once at load time.
+
+    Only the declared variables become placeholders; any other braces in the
+    text are escaped so they are sent literally.
+    """
+
+    def __init__(self, category: str, name: str, text: str, variables: List[str]):
+        self.category = category
+        self.name = name
+        self.text = text
+        self.variables = list(variables)
+
+        format_string = text.replace("{", "{{").replace("}", "}}")
+        for var in self.variables:
+            format_string = format_string.replace(f"{{{{{var}}}}}", f"{{{var}}}")
+        self._format_string = format_string
+
+    def render(self, user: Dict[str, Any]) -> str:
+        if not self.variables:
+            return self.text
+        values = _KeepMissing({var: str(user[var]) for var in self.variables if var in user})
+        return self._format_string.format_map(values)
+
+    def undeclared_placeholders(self) -> List[str]:
+        """
+        Placeholders that appear in the text but are not listed in variables
+        """
+        return sorted(set(PLACEHOLDER_PATTERN.findall(self.text)) - set(self.variables))
+
+
+class MessageTemplates:
+    """
+    Category templates loaded from message_templates.json and compiled once
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, CompiledTemplate]]):
+        self.templates = templates
+
+    @classmethod
+    def load(cls, templates_file: str) -> "MessageTemplates":
+        """
+        Load and compile message templates from a JSON file
+        """
+        logger = logging.getLogger(__name__)
+        templates_path = Path(templates_file)
+        try:
+            if not templates_path.exists():
+                logger.error(f"Templates file not found: {templates_path}")
+                return cls({})
+
+            with open(templates_path, encoding="utf-8") as f:
+                raw = json.load(f)
+
+            compiled = {
+                category: {
+                    name: CompiledTemplate(category, name, template["text"], template.get("variables", []))
+                    for name, template in category_templates.items()
+                }
+                for category, category_templates in raw.items()
+            }
+
+            logger.info(f"Loaded templates for categories: {', '.join(compiled.keys())}")
+            return cls(compiled)
+
+        except Exception as e:
+            logger.error(f"Error loading templates: {str(e)}")
+            return cls({})
+
+    def get(self, category: str, template_name: Optional[str] = None) -> Optional[CompiledTemplate]:
+        """
+        Get a template for the given category and template name
+        If template_name is not provided, randomly select one
+        """
+        category_templates = self.templates.get(category)
+        if not category_templates:
+            return None
+
+        if template_name:
+            return category_templates.get(template_name)
+
+        return random.choice(list(category_templates.values()))
+
+    def validate(self, categories: Iterable[str], columns: Iterable[str]) -> List[str]:
+        """
+        Report user categories without templates and template variables that
+        no user column provides
+        """
+        columns = set(columns)
+        problems = []
+
+        for category in sorted(set(categories) - set(self.templates)):
+            problems.append(f"No template for category: {category}")
+
+        for category, category_templates in self.templates.items():
+            for name, template in category_templates.items():
+                for var in template.variables:
+                    if var not in columns:
+                        problems.append(f"Template {category}/{name} uses {{{var}}} but users have no '{var}' column")
+                for var in template.undeclared_placeholders():
+                    problems.append(f"Template {category}/{name} contains {{{var}}} which is not listed in its variables")
+
+        return problems
+
+    def render_all(self, users: pd.DataFrame) -> pd.DataFrame:
+        """
+        Render one message per user in bulk, picking a random template per
+        user the same way sending does
+        """
+        result = pd.DataFrame({
+            "username": users["username"],
+            "category": users["category"],
+            "template": pd.Series(None, index=users.index, dtype=object),
+            "message": pd.Series(None, index=users.index, dtype=object),
+        })
+
+        for category, group in users.groupby("category", sort=False):
+            category_templates = self.templates.get(category)
+            if not category_templates:
+                continue
+
+            names = list(category_templates.keys())
+            chosen = pd.Series(random.choices(names, k=len(group)), index=group.index)
+
+            for name, template in category_templates.items():
+                rows = group[chosen == name]
+                if rows.empty:
+                    continue
+
+                result.loc[rows.index, "template"] = name
+                if template.variables:
+                    result.loc[rows.index, "message"] = [
+                        template.render(user) for user in rows.to_dict("records")
+                    ]
+                else:
+                    # Static text, no per-user work needed
+                    result.loc[rows.index, "message"] = template.text
+
+        return result
@@ -0,0 +1,128 @@
+import math
+import logging
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.csv_processor import normalize_usernames
+
+# Second hash key for Bloom filter double hashing (must be 16 characters)
+BLOOM_HASH_KEY = "suppression-blm2"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over usernames with vectorized inserts and lookups.
+
+    False positives only ever suppress a user that could have been messaged,
+    never the other way round, which is the safe direction for opt-outs.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001):
+        size = int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+        self.size = max(size, 64)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, usernames: pd.Series) -> np.ndarray:
+        h1 = pd.util.hash_pandas_object(usernames, index=False).to_numpy()
+        h2 = pd.util.hash_pandas_object(usernames, index=False, hash_key=BLOOM_HASH_KEY).to_numpy()
+        steps = np.arange(self.hash_count, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.size)
+
+    def add(self, usernames: pd.Series) -> None:
+        positions = self._positions(usernames).ravel()
+        np.bitwise_or.at(self.bits, positions // 8, (1 << (positions % 8)).astype(np.uint8))
+
+    def contains(self, usernames: pd.Series) -> np.ndarray:
+        if usernames.empty:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(usernames)
+        hits = (self.bits[positions // 8] >> (positions % 8).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+
+class SuppressionIndex:
+    """
+    Usernames that must not be messaged: everyone already messaged
+    successfully according to the sent log plus everyone on the opt-out list.
+    Callers can add more names, e.g. usernames known not to exist.
+
+    Held as an exact set by default; with use_bloom the names go into a
+    Bloom filter sized for bloom_capacity entries instead, which keeps memory
+    bounded for very large lists at the cost of rare extra suppressions.
+    """
+
+    def __init__(
+        self,
+        sent_log_file: str = "logs/sent_log.csv",
+        opt_out_file: str = "data/opt_out.txt",
+        use_bloom: bool = False,
+        bloom_capacity: int = 10_000_000,
+        chunk_size: int = 100_000
+    ):
+        self.sent_log_file = Path(sent_log_file)
+        self.opt_out_file = Path(opt_out_file)
+        self.chunk_size = chunk_size
+        self.logger = logging.getLogger(__name__)
+        self.usernames: set = set()
+        self.bloom: Optional[BloomFilter] = BloomFilter(bloom_capacity) if use_bloom else None
+        # Names added to the Bloom filter, which cannot count itself
+        self.count = 0
+
+    def load(self) -> "SuppressionIndex":
+        """
+        Build the index from the sent log and the opt-out list
+        """
+        try:
+            if self.sent_log_file.exists():
+                for chunk in pd.read_csv(
+                    self.sent_log_file,
+                    usecols=["username", "status"],
+                    dtype=str,
+                    chunksize=self.chunk_size
+                ):
+                    self.add(chunk.loc[chunk["status"].str.lower() == "success", "username"].dropna())
+
+            if self.opt_out_file.exists():
+                self.add(self._read_opt_out())
+
+            self.logger.info(f"Suppression index loaded with {len(self)} entries")
+
+        except Exception as e:
+            self.logger.error(f"Error loading suppression index: {str(e)}")
+
+        return self
+
+    def __len__(self) -> int:
+        return self.count if self.bloom is not None else len(self.usernames)
+
+    def add(self, usernames: Iterable[str]) -> None:
+        if not isinstance(usernames, pd.Series):
+            usernames = pd.Series(list(usernames), dtype=object)
+
+        usernames = normalize_usernames(usernames)
+        if usernames.empty:
+            return
+
+        if self.bloom is not None:
+            self.bloom.add(usernames)
+            self.count += len(usernames)
+        else:
+            self.usernames.update(usernames)
+
+    def mask(self, usernames: pd.Series) -> np.ndarray:
+        """
+        Return a boolean mask of usernames that are suppressed
+        """
+        normalized = normalize_usernames(usernames)
+        if self.bloom is not None:
+            return self.bloom.contains(normalized)
+        return normalized.isin(self.usernames).to_numpy()
+
+    def _read_opt_out(self) -> pd.Series:
+        with open(self.opt_out_file, encoding="utf-8") as f:
+            lines = [line.strip() for line in f]
+        return pd.Series([line for line in lines if line and not line.startswith("#")], dtype=object)
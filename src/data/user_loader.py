@@ -1,79 +1,324 @@
-import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import csv
 import logging
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
+from src.data.suppression import SuppressionIndex
+from src.data.user_record import UserRecord
+from src.data.user_store import UserStore
+
+class UserStream:
+    """
+    Pending users read from the store page by page as they are consumed.
+
+    len() is the number of pending rows left (one indexed COUNT, cached);
+    suppressed users are skipped while iterating, so fewer may be yielded.
+    consumed counts rows read so far, including skipped ones. With
+    mark_suppressed, skipped users get the terminal "suppressed" status as
+    each page is read, so later runs neither count nor scan them again.
+    """
+
+    def __init__(
+        self,
+        store: UserStore,
+        suppression: Optional[SuppressionIndex] = None,
+        after_id: int = 0,
+        chunk_size: int = 1000,
+        mark_suppressed: bool = False
+    ):
+        self.store = store
+        self.suppression = suppression
+        self.after_id = after_id
+        self.chunk_size = chunk_size
+        self.mark_suppressed = mark_suppressed
+        self.consumed = 0
+        self.skipped = 0
+        self._length: Optional[int] = None
+
+    def __len__(self) -> int:
+        if self._length is None:
+            self._length = self.store.count_users("pending", self.after_id)
+        return self._length
+
+    def peek(self) -> Optional[UserRecord]:
+        """
+        Return the first user the stream would yield without consuming it
+        """
+        after_id = self.after_id
+        while True:
+            records = self.store.fetch_records("pending", after_id, self.chunk_size)
+            if not records:
+                return None
+            if self.suppression is None:
+                return records[0]
+
+            usernames = pd.Series([record.username for record in records], dtype=object)
+            kept = np.flatnonzero(~self.suppression.mask(usernames))
+            if len(kept):
+                return records[kept[0]]
+            after_id = records[-1].row_id
+
+    def __iter__(self) -> Iterator[UserRecord]:
+        after_id = self.after_id
+        while True:
+            # Keyset pagination keeps every query short, so no read
+            # transaction stays open while messages are being sent
+            records = self.store.fetch_records("pending", after_id, self.chunk_size)
+            if not records:
+                return
+            after_id = records[-1].row_id
+
+            keep = [True] * len(records)
+            if self.suppression is not None:
+                usernames = pd.Series([record.username for record in records], dtype=object)
+                keep = ~self.suppression.mask(usernames)
+                if self.mark_suppressed and not keep.all():
+                    self.store.update_statuses(
+                        (record.username, "suppressed") for record, kept in zip(records, keep) if not kept
+                    )
+
+            for record, kept in zip(records, keep):
+                self.consumed += 1
+                if kept:
+                    yield record
+                else:
+                    self.skipped += 1
+
 class UserLoader:
-    def __init__(self, csv_path: str):
+    """
+    Loads users from CSV through an indexed SQLite store.
+
+    The CSV is imported into the store the first time it is seen and again
+    whenever its size or modification time changes; statuses are then read
+    and written in the store and exported back to CSV on demand.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        db_path: Optional[str] = None,
+        suppression: Optional[SuppressionIndex] = None
+    ):
         self.csv_path = Path(csv_path)
+        self.db_path = Path(db_path) if db_path else self.csv_path.with_suffix(".db")
+        self.store = UserStore(self.db_path)
+        self.suppression = suppression
         self.logger = logging.getLogger(__name__)
 
-    def load_users(self) -> List[Dict[str, Any]]:
+    def load_users(self, after_id: int = 0) -> List[Dict[str, Any]]:
         """
-        Load users from CSV file and return as list of dictionaries
+        Load pending users and return them as a list of dictionaries
+
+        Users in the suppression index (already messaged or opted out) are
+        dropped here, before anything is sent. after_id resumes behind a run
+        cursor (the "row_id" of the last processed user).
         """
         try:
-            if not self.csv_path.exists():
-                self.logger.error(f"CSV file not found: {self.csv_path}")
-                return []
-
-            # Read CSV file
-            df = pd.read_csv(self.csv_path)
-
-            # Validate required columns
-            required_columns = ["username", "category", "status"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            
-            if missing_columns:
-                self.logger.error(f"Missing required columns: {', '.join(missing_columns)}")
+            if not self._sync_from_csv():
                 return []
 
             # Filter for pending users only
-            df = df[df["status"].str.lower() == "pending"]
+            users = list(self.store.iter_users(status="pending", after_id=after_id))
+
+            if self.suppression is not None and users:
+                usernames = pd.Series([user["username"] for user in users], dtype=object)
+                keep = ~self.suppression.mask(usernames)
+                suppressed = len(users) - int(keep.sum())
+                users = [user for user, kept in zip(users, keep) if kept]
+                if suppressed:
+                    self.logger.info(f"Skipped {suppressed} already contacted or opted-out users")
 
-            # Convert to list of dictionaries
-            users = df.to_dict("records")
-            
-            self.logger.info(f"Loaded {len(users)} pending users from {self.csv_path}")
+            self.logger.info(f"Loaded {len(users)} pending users from {self.db_path}")
             return users
 
         except Exception as e:
-            self.logger.error(f"Error loading users from CSV: {str(e)}")
+            self.logger.error(f"Error loading users: {str(e)}")
             return []
 
-    def update_user_status(self, username: str, new_status: str) -> bool:
+    def iter_users(
+        self,
+        after_id: int = 0,
+        chunk_size: int = 1000,
+        mark_suppressed: bool = False
+    ) -> Optional[UserStream]:
         """
-        Update the status of a user in the CSV file
+        Stream pending users as compact records instead of loading them all
         """
         try:
-            df = pd.read_csv(self.csv_path)
-            
-            # Find the user and update status
-            mask = df["username"] == username
-            if not mask.any():
-                self.logger.error(f"User not found: {username}")
-                return False
+            if not self._sync_from_csv():
+                return None
+            return UserStream(self.store, self.suppression, after_id, chunk_size, mark_suppressed)
 
-            df.loc[mask, "status"] = new_status
-            
-            # Save back to CSV
-            df.to_csv(self.csv_path, index=False)
-            self.logger.info(f"Updated status for user {username} to {new_status}")
-            return True
+        except Exception as e:
+            self.logger.error(f"Error loading users: {str(e)}")
+            return None
+
+    def get_pending_profile(self, after_id: int = 0) -> Tuple[List[str], List[str]]:
+        """
+        Get the categories and columns of all pending users, for validating
+        templates before a run
+        """
+        try:
+            if not self._sync_from_csv():
+                return [], []
+            return self.store.pending_profile(after_id)
 
         except Exception as e:
-            self.logger.error(f"Error updating user status: {str(e)}")
+            self.logger.error(f"Error reading user categories: {str(e)}")
+            return [], []
+
+    def update_user_status(self, username: str, new_status: str) -> bool:
+        """
+        Update the status of a single user
+        """
+        if self.update_user_statuses([(username, new_status)]) == 0:
+            self.logger.error(f"User not found: {username}")
             return False
 
+        self.logger.info(f"Updated status for user {username} to {new_status}")
+        return True
+
+    def update_user_statuses(self, updates: Iterable[Tuple[str, str]]) -> int:
+        """
+        Update the status of many users in one transaction, returns rows changed
+        """
+        try:
+            if not self._sync_from_csv():
+                return 0
+            return self.store.update_statuses(updates)
+
+        except Exception as e:
+            self.logger.error(f"Error updating user status: {str(e)}")
+            return 0
+
     def get_user_count(self) -> Dict[str, int]:
         """
         Get count of users by status
         """
         try:
-            df = pd.read_csv(self.csv_path)
-            status_counts = df["status"].value_counts().to_dict()
-            return status_counts
+            if not self._sync_from_csv():
+                return {}
+            return self.store.count_by_status()
 
         except Exception as e:
             self.logger.error(f"Error getting user counts: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {}
+
+    def start_run(self) -> Optional[str]:
+        """
+        Start a new send run and return its id
+        """
+        try:
+            return self.store.start_run()
+
+        except Exception as e:
+            self.logger.error(f"Error starting run: {str(e)}")
+            return None
+
+    def get_run(self, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a run by id, or the most recent unfinished run
+        """
+        try:
+            return self.store.get_run(run_id)
+
+        except Exception as e:
+            self.logger.error(f"Error reading run: {str(e)}")
+            return None
+
+    def checkpoint(
+        self,
+        run_id: str,
+        cursor: int,
+        updates: Iterable[Tuple[str, str]],
+        status: str = "running"
+    ) -> bool:
+        """
+        Persist a batch of status updates together with the run cursor
+        """
+        try:
+            self.store.checkpoint(run_id, cursor, updates, status)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error saving run checkpoint: {str(e)}")
+            return False
+
+    def import_csv(self) -> bool:
+        """
+        Import the CSV file into the store, keeping statuses already recorded
+        """
+        try:
+            if not self.csv_path.exists():
+                self.logger.error(f"CSV file not found: {self.csv_path}")
+                return False
+
+            missing_columns = self._missing_columns()
+            if missing_columns:
+                self.logger.error(f"Missing required columns: {', '.join(missing_columns)}")
+                return False
+
+            count = self.store.import_csv(self.csv_path)
+            self.store.set_meta("csv_signature", self._csv_signature())
+            self.logger.info(f"Imported {count} users from {self.csv_path} into {self.db_path}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error importing users from CSV: {str(e)}")
+            return False
+
+    def export_csv(self, output_path: Optional[str] = None) -> bool:
+        """
+        Export the store, including current statuses, to CSV
+        """
+        try:
+            if not self._sync_from_csv():
+                return False
+
+            target = Path(output_path) if output_path else self.csv_path
+            target.parent.mkdir(exist_ok=True)
+            count = self.store.export_csv(target)
+
+            # Our own export must not trigger a re-import on the next run
+            if target == self.csv_path:
+                self.store.set_meta("csv_signature", self._csv_signature())
+
+            self.logger.info(f"Exported {count} users to {target}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error exporting users to CSV: {str(e)}")
+            return False
+
+    def close(self) -> None:
+        self.store.close()
+
+    def _sync_from_csv(self) -> bool:
+        """
+        Import the CSV if the store has not seen this version of it yet
+        """
+        if not self.csv_path.exists():
+            if self.db_path.exists():
+                return True
+            self.logger.error(f"CSV file not found: {self.csv_path}")
+            return False
+
+        if self.store.get_meta("csv_signature") == self._csv_signature():
+            return True
+
+        return self.import_csv()
+
+    def _csv_signature(self) -> str:
+        stat = self.csv_path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _missing_columns(self) -> List[str]:
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            header = next(csv.reader(f), [])
+
+        # Validate required columns
+        required_columns = ["username", "category", "status"]
+        return [col for col in required_columns if col not in header]
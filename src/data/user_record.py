@@ -0,0 +1,64 @@
+import json
+from typing import Any, Dict, Iterator, Optional
+
+FIELDS = ("row_id", "username", "category", "status", "followersCount")
+
+
+class UserRecord:
+    """
+    Compact, read-only view of one user row.
+
+    Uses __slots__ instead of a per-user dict; extra CSV columns stay as the
+    raw JSON string until something asks for them. Supports the dict-style
+    access (user["username"], "var" in user) that the sender and templates use.
+    """
+
+    __slots__ = ("row_id", "username", "category", "status", "followersCount", "_extra")
+
+    def __init__(
+        self,
+        row_id: int,
+        username: str,
+        category: Optional[str],
+        status: str,
+        followers_count: Optional[int],
+        extra: Optional[str] = None
+    ):
+        self.row_id = row_id
+        self.username = username
+        self.category = category
+        self.status = status
+        self.followersCount = followers_count
+        self._extra = extra
+
+    @property
+    def extra(self) -> Dict[str, Any]:
+        if not self._extra:
+            return {}
+        if isinstance(self._extra, str):
+            self._extra = json.loads(self._extra)
+        return self._extra
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in FIELDS or key in self.extra
+
+    def __iter__(self) -> Iterator[str]:
+        yield from FIELDS
+        yield from self.extra
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    def __repr__(self) -> str:
+        return f"UserRecord({self.username!r}, {self.category!r}, {self.status!r})"
@@ -0,0 +1,299 @@
+import json
+import sqlite3
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.data.user_record import UserRecord
+from src.utils.sqlite_db import open_wal_connection
+
+# Columns stored in their own table columns; anything else in the CSV is
+# kept as JSON in "extra" so template variables keep working
+CORE_COLUMNS = ["username", "category", "status", "followersCount"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    category TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    followers_count INTEGER,
+    extra TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username);
+CREATE INDEX IF NOT EXISTS idx_users_status ON users (status);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Re-importing a CSV never downgrades a status that a run already recorded
+UPSERT_USER = """
+INSERT INTO users (username, category, status, followers_count, extra)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (username) DO UPDATE SET
+    category = excluded.category,
+    followers_count = excluded.followers_count,
+    extra = excluded.extra,
+    status = CASE WHEN users.status = 'pending' THEN excluded.status ELSE users.status END
+"""
+
+
+class UserStore:
+    """
+    SQLite (WAL) backed user list with indexed status lookups
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = Path(db_path)
+        self.logger = logging.getLogger(__name__)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_wal_connection(self.db_path, SCHEMA)
+            self._conn.row_factory = sqlite3.Row
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def import_csv(self, csv_path: Path, chunk_size: int = 50_000) -> int:
+        """
+        Sync users from a CSV file in one transaction, returns rows read
+
+        Rows are upserted, and pending users that are no longer in the file
+        are removed so the CSV keeps deciding who gets messaged. Users with a
+        recorded outcome are kept for their history.
+        """
+        total = 0
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS imported (username TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM temp.imported")
+
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_size, dtype={"username": str}):
+                chunk = chunk.dropna(subset=["username"])
+                rows = self._rows_from_frame(chunk)
+                self.conn.executemany(UPSERT_USER, rows)
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO temp.imported (username) VALUES (?)", [(row[0],) for row in rows]
+                )
+                total += len(chunk)
+
+            removed = self.conn.execute(
+                "DELETE FROM users WHERE status = 'pending' "
+                "AND username NOT IN (SELECT username FROM temp.imported)"
+            ).rowcount
+            self.conn.execute("DELETE FROM temp.imported")
+
+        if removed:
+            self.logger.info(f"Removed {removed} pending users that are no longer in {csv_path}")
+        return total
+
+    def export_csv(self, csv_path: Path, chunk_size: int = 50_000) -> int:
+        """
+        Write all users back to a CSV file in the original column layout
+        """
+        total = 0
+        cursor = self.conn.execute(
+            "SELECT username, category, status, followers_count, extra FROM users ORDER BY id"
+        )
+
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                df = pd.DataFrame([self._row_to_user(row) for row in rows])
+                df["followersCount"] = df["followersCount"].astype("Int64")
+                df.to_csv(f, index=False, header=(total == 0))
+                total += len(rows)
+
+            if total == 0:
+                f.write(",".join(CORE_COLUMNS) + "\n")
+
+        return total
+
+    def iter_users(self, status: Optional[str] = None, after_id: int = 0) -> Iterable[Dict[str, Any]]:
+        """
+        Yield users in insertion order, optionally filtered by status and
+        starting after the given row id; each user carries its "row_id"
+        """
+        query = "SELECT id, username, category, status, followers_count, extra FROM users WHERE id > ?"
+        params: Tuple = (after_id,)
+        if status is not None:
+            query += " AND status = ?"
+            params += (status.lower(),)
+        query += " ORDER BY id"
+
+        for row in self.conn.execute(query, params):
+            user = self._row_to_user(row)
+            user["row_id"] = row["id"]
+            yield user
+
+    def fetch_records(self, status: str, after_id: int, limit: int) -> List[UserRecord]:
+        """
+        Fetch the next page of users with the given status after a row id
+        """
+        cursor = self.conn.execute(
+            "SELECT id, username, category, status, followers_count, extra FROM users "
+            "WHERE status = ? AND id > ? ORDER BY id LIMIT ?",
+            (status.lower(), after_id, limit)
+        )
+        return [UserRecord(*row) for row in cursor]
+
+    def count_users(self, status: str, after_id: int = 0) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM users WHERE status = ? AND id > ?", (status.lower(), after_id)
+        ).fetchone()
+        return row[0]
+
+    def pending_profile(self, after_id: int = 0) -> Tuple[List[str], List[str]]:
+        """
+        Distinct categories and columns of the pending users after a row id,
+        computed in SQL so no user rows are loaded
+        """
+        categories = [
+            row[0] for row in self.conn.execute(
+                "SELECT DISTINCT category FROM users "
+                "WHERE status = 'pending' AND id > ? AND category IS NOT NULL",
+                (after_id,)
+            )
+        ]
+        extra_columns = [
+            row[0] for row in self.conn.execute(
+                "SELECT DISTINCT json_each.key FROM users, json_each(users.extra) "
+                "WHERE users.status = 'pending' AND users.id > ? AND users.extra IS NOT NULL",
+                (after_id,)
+            )
+        ]
+        return categories, CORE_COLUMNS + extra_columns
+
+    def update_statuses(self, updates: Iterable[Tuple[str, str]]) -> int:
+        """
+        Apply (username, status) updates in a single transaction, returns rows changed
+        """
+        with self.conn:
+            cursor = self.conn.executemany(
+                "UPDATE users SET status = ? WHERE username = ?",
+                [(status.lower(), username) for username, status in updates]
+            )
+        return cursor.rowcount
+
+    def start_run(self) -> str:
+        """
+        Register a new send run and return its id
+        """
+        run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs (run_id, started_at, updated_at, status) VALUES (?, ?, ?, 'running')",
+                (run_id, now, now)
+            )
+        return run_id
+
+    def get_run(self, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a run by id, or the most recent unfinished run
+        """
+        if run_id is not None:
+            row = self.conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT * FROM runs WHERE status != 'completed' ORDER BY started_at DESC, rowid DESC LIMIT 1"
+            ).fetchone()
+        return dict(row) if row else None
+
+    def checkpoint(
+        self,
+        run_id: str,
+        cursor: int,
+        updates: Iterable[Tuple[str, str]],
+        status: str = "running"
+    ) -> None:
+        """
+        Write a batch of status updates and advance the run cursor atomically
+        """
+        updates = [(new_status.lower(), username) for username, new_status in updates]
+        with self.conn:
+            self.conn.executemany("UPDATE users SET status = ? WHERE username = ?", updates)
+            self.conn.execute(
+                "UPDATE runs SET cursor = MAX(cursor, ?), processed = processed + ?, status = ?, updated_at = ? "
+                "WHERE run_id = ?",
+                (cursor, len(updates), status, datetime.now().isoformat(timespec="seconds"), run_id)
+            )
+
+    def count_by_status(self) -> Dict[str, int]:
+        cursor = self.conn.execute("SELECT status, COUNT(*) AS n FROM users GROUP BY status")
+        return {row["status"]: row["n"] for row in cursor}
+
+    @staticmethod
+    def _rows_from_frame(df: pd.DataFrame) -> List[Tuple]:
+        extra_columns = [col for col in df.columns if col not in CORE_COLUMNS]
+        usernames = df["username"].astype(str).str.strip()
+        categories = df["category"] if "category" in df.columns else pd.Series(None, index=df.index)
+        statuses = (
+            df["status"].fillna("pending").astype(str).str.lower()
+            if "status" in df.columns else pd.Series("pending", index=df.index)
+        )
+        followers = (
+            pd.to_numeric(df["followersCount"], errors="coerce")
+            if "followersCount" in df.columns else pd.Series(None, index=df.index, dtype=float)
+        )
+        extras = (
+            df[extra_columns].to_dict("records") if extra_columns else [None] * len(df)
+        )
+
+        return [
+            (
+                username,
+                None if pd.isna(category) else category,
+                status,
+                None if pd.isna(count) else int(count),
+                json.dumps(extra, ensure_ascii=False, default=str) if extra else None,
+            )
+            for username, category, status, count, extra in zip(
+                usernames, categories, statuses, followers, extras
+            )
+        ]
+
+    @staticmethod
+    def _row_to_user(row: sqlite3.Row) -> Dict[str, Any]:
+        user = {
+            "username": row["username"],
+            "category": row["category"],
+            "status": row["status"],
+            "followersCount": row["followers_count"],
+        }
+        if row["extra"]:
+            user.update(json.loads(row["extra"]))
+        return user
@@ -1,24 +1,33 @@
-import json
 import time
 import random
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
-from datetime import datetime
-import csv
 import os
-import pandas as pd
 
 from src.auth.instagram_client import InstagramClient
+from src.data.message_templates import CompiledTemplate, MessageTemplates
+from src.services.rate_limiter import RateLimiter
+from src.services.send_journal import SendJournal
+from src.utils.metrics import metrics
 
 class DMSender:
-    def __init__(self, client: InstagramClient, templates_file: str):
+    def __init__(
+        self,
+        client: InstagramClient,
+        templates_file: str,
+        rate_limiter: Optional[RateLimiter] = None,
+        journal: Optional[SendJournal] = None,
+        run_id: Optional[str] = None
+    ):
         self.client = client
         self.templates_file = Path(templates_file)
         self.logger = logging.getLogger(__name__)
-        self.templates = self._load_templates()
+        self.templates = MessageTemplates.load(templates_file)
         self.log_file = Path("logs/sent_log.csv")
-        self._ensure_log_file()
+        self.journal = journal or SendJournal(csv_file=str(self.log_file))
+        self.run_id = run_id
+        self.rate_limiter = rate_limiter or RateLimiter(sent_log_file=str(self.log_file))
 
     def send_message(self, user: Dict[str, Any]) -> bool:
         """
@@ -41,75 +50,50 @@ class DMSender:
             self._random_delay()
 
             # Send the message
+            started = time.perf_counter()
             success = self.client.send_dm(username, message)
+            latency_ms = (time.perf_counter() - started) * 1000
+            metrics.observe("send_dm", latency_ms)
+            metrics.event("messages_sent" if success else "messages_failed")
+            if not success and self.client.last_error is not None:
+                metrics.error("send_dm", type(self.client.last_error).__name__)
+            self.rate_limiter.record()
 
             # Log the attempt
-            self._log_attempt(username, category, success)
+            self._log_attempt(
+                username,
+                category,
+                success,
+                error=None if success else self.client.last_error,
+                latency_ms=latency_ms,
+                template=template.name
+            )
 
             return success
 
         except Exception as e:
+            metrics.error("send_message", type(e).__name__)
             self.logger.error(f"Error sending message: {str(e)}")
             return False
 
-    def _load_templates(self) -> Dict[str, Any]:
-        """
-        Load message templates from JSON file
-        """
-        try:
-            if not self.templates_file.exists():
-                self.logger.error(f"Templates file not found: {self.templates_file}")
-                return {}
-
-            with open(self.templates_file, encoding='utf-8') as f:
-                templates = json.load(f)
-            
-            self.logger.info(f"Loaded templates for categories: {', '.join(templates.keys())}")
-            return templates
-
-        except Exception as e:
-            self.logger.error(f"Error loading templates: {str(e)}")
-            return {}
-
-    def _get_template(self, category: str, template_name: str = None) -> Dict[str, Any]:
+    def _get_template(self, category: str, template_name: str = None) -> Optional[CompiledTemplate]:
         """
         Get a template for the given category and template name
         If template_name is not provided, randomly select one
         """
-        try:
-            category_templates = self.templates.get(category, {})
-            if not category_templates:
-                return None
-
-            if template_name:
-                return category_templates.get(template_name)
-            
-            # Randomly select a template from available ones
-            template_key = random.choice(list(category_templates.keys()))
-            return category_templates[template_key]
-
-        except Exception as e:
-            self.logger.error(f"Error getting template: {str(e)}")
-            return None
+        return self.templates.get(category, template_name)
 
-    def _format_message(self, template: Dict[str, Any], user: Dict[str, Any]) -> str:
+    def _format_message(self, template: CompiledTemplate, user: Dict[str, Any]) -> str:
         """
         Format message template with variables
         """
         try:
-            message = template["text"]
-            variables = template.get("variables", [])
-
-            # Replace variables in message
-            for var in variables:
-                if var in user:
-                    message = message.replace(f"{{{var}}}", str(user[var]))
-
-            return message
+            with metrics.span("render_template"):
+                return template.render(user)
 
         except Exception as e:
             self.logger.error(f"Error formatting message: {str(e)}")
-            return template["text"]  # Return unformatted template as fallback
+            return template.text  # Return unformatted template as fallback
 
     def _random_delay(self) -> None:
         """
@@ -120,50 +104,41 @@ class DMSender:
         delay = random.randint(min_delay, max_delay)
         time.sleep(delay)
 
-    def _ensure_log_file(self) -> None:
+    def _log_attempt(
+        self,
+        username: str,
+        category: str,
+        success: bool,
+        error: Optional[Exception] = None,
+        latency_ms: Optional[float] = None,
+        template: Optional[str] = None
+    ) -> None:
         """
-        Ensure log file exists with headers
+        Log message sending attempt
         """
         try:
-            self.log_file.parent.mkdir(exist_ok=True)
-            
-            if not self.log_file.exists():
-                with open(self.log_file, "w", newline="") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["timestamp", "username", "category", "status", "error"])
+            with metrics.span("log_write"):
+                self.journal.record(
+                    username,
+                    category,
+                    success,
+                    error=error,
+                    latency_ms=latency_ms,
+                    template=template,
+                    run_id=self.run_id
+                )
 
         except Exception as e:
-            self.logger.error(f"Error ensuring log file: {str(e)}")
+            self.logger.error(f"Error logging attempt: {str(e)}")
 
-    def _log_attempt(self, username: str, category: str, success: bool) -> None:
+    def close(self) -> None:
         """
-        Log message sending attempt
+        Flush and close the send journal
         """
-        try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            status = "success" if success else "failed"
-            error = "" if success else "Message sending failed"
-
-            with open(self.log_file, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow([timestamp, username, category, status, error])
-
-        except Exception as e:
-            self.logger.error(f"Error logging attempt: {str(e)}")
+        self.journal.close()
 
     def get_daily_sent_count(self) -> int:
         """
         Get count of messages sent today
         """
-        try:
-            if not self.log_file.exists():
-                return 0
-
-            df = pd.read_csv(self.log_file)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            today = datetime.now().date()
-            return len(df[df["timestamp"].dt.date == today])
-
-        except Exception as e:
-            self.logger.error(f"Error getting daily sent count: {str(e)}")
-            return 0 
\ No newline at end of file
+        return self.rate_limiter.sent_today()
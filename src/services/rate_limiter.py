@@ -1 +1,105 @@
- 
\ No newline at end of file
+import csv
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.utils.atomic import atomic_write_text
+
+# Per-day counters older than this are dropped from the state file
+KEEP_DAYS = 30
+
+
+class RateLimiter:
+    """
+    Daily message budget with per-day counters persisted to a small JSON file.
+
+    Counts are kept in memory, so checking the budget is constant time; the
+    state file is rewritten atomically after every recorded send so a restart
+    resumes with the correct count for the day.
+    """
+
+    def __init__(
+        self,
+        daily_limit: Optional[int] = None,
+        state_file: str = "data/rate_limit.json",
+        sent_log_file: str = "logs/sent_log.csv"
+    ):
+        self.daily_limit = daily_limit if daily_limit is not None else int(os.getenv("MAX_DAILY_MESSAGES", "50"))
+        self.state_file = Path(state_file)
+        self.sent_log_file = Path(sent_log_file)
+        self.logger = logging.getLogger(__name__)
+        self.counts = self._load_state()
+
+    def sent_today(self) -> int:
+        """
+        Get count of messages recorded today
+        """
+        return self.counts.get(date.today().isoformat(), 0)
+
+    def remaining(self) -> int:
+        """
+        Get how many messages can still be sent today
+        """
+        return max(self.daily_limit - self.sent_today(), 0)
+
+    def can_send(self) -> bool:
+        return self.remaining() > 0
+
+    def record(self, count: int = 1) -> None:
+        """
+        Record sent messages against today's budget and persist the counters
+        """
+        today = date.today().isoformat()
+        self.counts[today] = self.counts.get(today, 0) + count
+        self._save_state()
+
+    def _load_state(self) -> Dict[str, int]:
+        """
+        Load saved counters, seeding them once from the sent log if there are none
+        """
+        try:
+            if self.state_file.exists():
+                with open(self.state_file, encoding="utf-8") as f:
+                    return {day: int(count) for day, count in json.load(f).items()}
+
+            counts = self._count_sent_log()
+            if counts:
+                self.counts = counts
+                self._save_state()
+            return counts
+
+        except Exception as e:
+            self.logger.error(f"Error loading rate limit state: {str(e)}")
+            return {}
+
+    def _count_sent_log(self) -> Dict[str, int]:
+        """
+        Count recent attempts per day from the sent log
+        """
+        counts: Dict[str, int] = {}
+        if not self.sent_log_file.exists():
+            return counts
+
+        cutoff = (date.today() - timedelta(days=KEEP_DAYS)).isoformat()
+        with open(self.sent_log_file, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                day = (row.get("timestamp") or "")[:10]
+                if day >= cutoff:
+                    counts[day] = counts.get(day, 0) + 1
+        return counts
+
+    def _save_state(self) -> None:
+        """
+        Atomically write the counters for the last KEEP_DAYS days
+        """
+        try:
+            cutoff = (date.today() - timedelta(days=KEEP_DAYS)).isoformat()
+            self.counts = {day: count for day, count in self.counts.items() if day >= cutoff}
+
+            atomic_write_text(self.state_file, json.dumps(self.counts))
+
+        except Exception as e:
+            self.logger.error(f"Error saving rate limit state: {str(e)}")
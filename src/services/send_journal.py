@@ -0,0 +1,174 @@
+import atexit
+import csv
+import io
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Column layout of logs/sent_log.csv, kept for existing readers
+CSV_COLUMNS = ["timestamp", "username", "category", "status", "error"]
+
+
+class SendJournal:
+    """
+    Append-only journal of send attempts.
+
+    Each attempt is one JSON line in journal_file with an attempt id, latency,
+    error class and template name. The same attempt is mirrored to the legacy
+    sent_log.csv layout. Both files stay open for the life of the journal and
+    records are buffered until flush_every of them are pending; with fsync
+    every flush is also forced to disk. A torn last line left by a crash is
+    skipped by readers and closed off by the next writer.
+    """
+
+    def __init__(
+        self,
+        journal_file: str = "logs/send_journal.jsonl",
+        csv_file: Optional[str] = "logs/sent_log.csv",
+        flush_every: Optional[int] = None,
+        fsync: Optional[bool] = None
+    ):
+        self.journal_file = Path(journal_file)
+        self.csv_file = Path(csv_file) if csv_file else None
+        self.flush_every = max(flush_every if flush_every is not None else int(os.getenv("JOURNAL_FLUSH_EVERY", "1")), 1)
+        self.fsync = fsync if fsync is not None else os.getenv("JOURNAL_FSYNC", "true").lower() == "true"
+        self.logger = logging.getLogger(__name__)
+        self._pending: List[Dict[str, Any]] = []
+        self._journal = None
+        self._csv = None
+        atexit.register(self.close)
+
+    def record(
+        self,
+        username: str,
+        category: str,
+        success: bool,
+        error: Optional[BaseException] = None,
+        latency_ms: Optional[float] = None,
+        template: Optional[str] = None,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """
+        Add an attempt to the journal and return the stored record
+        """
+        entry = {
+            "attempt_id": uuid.uuid4().hex,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "username": username,
+            "category": category,
+            "status": "success" if success else "failed",
+            "error_class": type(error).__name__ if error is not None else None,
+            "error": str(error) if error is not None else ("" if success else "Message sending failed"),
+            "latency_ms": round(latency_ms, 1) if latency_ms is not None else None,
+            "template": template,
+            **extra,
+        }
+        self._pending.append(entry)
+
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return entry
+
+    def flush(self) -> None:
+        """
+        Write pending records to both files
+        """
+        if not self._pending:
+            return
+
+        try:
+            self._open()
+
+            self._journal.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._pending))
+            if self._csv is not None:
+                writer = csv.writer(self._csv)
+                writer.writerows(self._csv_row(entry) for entry in self._pending)
+
+            for f in (self._journal, self._csv):
+                if f is None:
+                    continue
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+            self._pending = []
+
+        except Exception as e:
+            self.logger.error(f"Error writing send journal: {str(e)}")
+
+    def close(self) -> None:
+        self.flush()
+        for f in (self._journal, self._csv):
+            if f is not None:
+                f.close()
+        self._journal = None
+        self._csv = None
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield journal records in order, skipping a torn trailing line
+        """
+        self.flush()
+        if not self.journal_file.exists():
+            return
+
+        with open(self.journal_file, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    self.logger.warning("Skipping corrupt send journal line")
+
+    def export_csv(self, csv_path: str) -> int:
+        """
+        Rebuild a sent_log.csv compatible file from the journal
+        """
+        count = 0
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for entry in self.iter_records():
+                writer.writerow(self._csv_row(entry))
+                count += 1
+        return count
+
+    def _open(self) -> None:
+        if self._journal is None:
+            self._journal = self._open_append(self.journal_file)
+        if self.csv_file is not None and self._csv is None:
+            new_file = not self.csv_file.exists() or self.csv_file.stat().st_size == 0
+            self._csv = self._open_append(self.csv_file, newline="")
+            if new_file:
+                csv.writer(self._csv).writerow(CSV_COLUMNS)
+
+    @staticmethod
+    def _open_append(path: Path, newline: Optional[str] = None) -> io.TextIOWrapper:
+        """
+        Open a file for appending, terminating a torn last line first
+        """
+        path.parent.mkdir(exist_ok=True)
+        torn = False
+        if path.exists() and path.stat().st_size > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+
+        f = open(path, "a", newline=newline, encoding="utf-8")
+        if torn:
+            f.write("\n")
+        return f
+
+    @staticmethod
+    def _csv_row(entry: Dict[str, Any]) -> List[str]:
+        # Only the error class goes to the CSV, so per-user details in the
+        # message do not split the error breakdown; the journal keeps the text
+        error = entry.get("error_class") or entry.get("error") or ""
+        # One attempt per line, so readers that tail the log can split on newlines
+        error = " ".join(error.split())
+        return [entry["timestamp"], entry["username"], entry["category"], entry["status"], error]
@@ -0,0 +1,159 @@
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from src.utils.atomic import atomic_write_text
+
+# Bytes read from the log per parsing step
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Leading bytes of the log remembered to notice when it is replaced
+FINGERPRINT_SIZE = 256
+
+# Bump when the rollup layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "version": CACHE_VERSION,
+        "offset": 0,
+        "fingerprint": "",
+        "columns": [],
+        "total": 0,
+        "by_status": {},
+        "by_day": {},
+        "by_category": {},
+        "errors": {},
+    }
+
+
+def _add_counts(target: Dict[str, Any], counts: Dict[str, int]) -> None:
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + int(count)
+
+
+class SentLogStats:
+    """
+    Incremental rollups of the sent log.
+
+    Aggregates are cached together with the byte offset of the last parsed
+    line, so each refresh only reads rows appended since the previous one.
+    The cache is rebuilt from scratch if the log is truncated or replaced.
+    """
+
+    def __init__(self, log_file: str = "logs/sent_log.csv", cache_file: str = "logs/stats_cache.json"):
+        self.log_file = Path(log_file)
+        self.cache_file = Path(cache_file)
+        self.logger = logging.getLogger(__name__)
+        self.stats = self._load_cache()
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Fold rows appended since the last checkpoint into the rollups
+        """
+        if not self.log_file.exists():
+            self.stats = _empty_stats()
+            return self.stats
+
+        size = self.log_file.stat().st_size
+        fingerprint = self._fingerprint()
+        if size < self.stats["offset"] or not fingerprint.startswith(self.stats["fingerprint"]):
+            self.logger.info("Sent log was truncated or replaced, rebuilding statistics")
+            self.stats = _empty_stats()
+
+        if size == self.stats["offset"]:
+            return self.stats
+
+        new_rows = 0
+        with open(self.log_file, "rb") as f:
+            f.seek(self.stats["offset"])
+
+            if self.stats["offset"] == 0:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return self.stats
+                self.stats["columns"] = header.decode("utf-8").strip().split(",")
+                self.stats["offset"] = f.tell()
+
+            remainder = b""
+            while True:
+                block = f.read(BLOCK_SIZE)
+                if not block:
+                    break
+
+                # Only parse complete lines, a partial last line is read next time
+                data = remainder + block
+                cut = data.rfind(b"\n")
+                if cut < 0:
+                    remainder = data
+                    continue
+
+                new_rows += self._ingest(data[:cut + 1])
+                self.stats["offset"] += cut + 1
+                remainder = data[cut + 1:]
+
+        self.stats["fingerprint"] = fingerprint
+        self._save_cache()
+        self.logger.info(f"Processed {new_rows} new sent log rows")
+        return self.stats
+
+    def _ingest(self, data: bytes) -> int:
+        """
+        Parse a block of complete CSV lines and add it to the rollups
+        """
+        # Imported here so show-stats with nothing new to read stays light
+        import pandas as pd
+
+        df = pd.read_csv(
+            io.BytesIO(data),
+            names=self.stats["columns"],
+            header=None,
+            dtype=str,
+            keep_default_na=False
+        )
+        if df.empty:
+            return 0
+
+        status = df["status"].str.lower()
+        day = df["timestamp"].str.slice(0, 10)
+
+        self.stats["total"] += len(df)
+        _add_counts(self.stats["by_status"], status.value_counts().to_dict())
+
+        for group_column, key in ((day, "by_day"), (df["category"], "by_category")):
+            grouped = pd.crosstab(group_column, status)
+            for name, row in grouped.iterrows():
+                _add_counts(self.stats[key].setdefault(str(name), {}), row.to_dict())
+
+        # Group by error class; rows written before the CSV held only the
+        # class carry "Class: message" with per-user details
+        errors = df.loc[status != "success", "error"].str.split(": ", n=1).str[0]
+        errors = errors[errors != ""]
+        _add_counts(self.stats["errors"], errors.value_counts().to_dict())
+
+        return len(df)
+
+    def _fingerprint(self) -> str:
+        with open(self.log_file, "rb") as f:
+            return f.read(FINGERPRINT_SIZE).hex()
+
+    def _load_cache(self) -> Dict[str, Any]:
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, encoding="utf-8") as f:
+                    stats = json.load(f)
+                if stats.get("version") == CACHE_VERSION:
+                    return {**_empty_stats(), **stats}
+                self.logger.info("Statistics cache is from an older version, rebuilding")
+        except Exception as e:
+            self.logger.error(f"Error loading statistics cache: {str(e)}")
+        return _empty_stats()
+
+    def _save_cache(self) -> None:
+        try:
+            atomic_write_text(self.cache_file, json.dumps(self.stats, ensure_ascii=False))
+        except Exception as e:
+            self.logger.error(f"Error saving statistics cache: {str(e)}")
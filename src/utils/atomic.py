@@ -0,0 +1,16 @@
+import os
+from pathlib import Path
+from typing import Union
+
+
+def atomic_write_text(path: Union[str, Path], content: str, encoding: str = "utf-8") -> None:
+    """
+    Write a text file through a temporary sibling and os.replace, so readers
+    and crashes never see a partially written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, "w", encoding=encoding) as f:
+        f.write(content)
+    os.replace(tmp_file, path)
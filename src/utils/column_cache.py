@@ -0,0 +1,156 @@
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.atomic import atomic_write_text
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+# Columns kept from each scraper export; ingestion needs nothing else
+CACHED_COLUMNS = ["username", "followersCount"]
+
+# Cache directory created inside the category directory
+CACHE_DIR_NAME = ".cache"
+
+
+class ColumnCache:
+    """
+    Columnar copies of scraper exports, one directory per export.
+
+    Each cached column is a raw binary file that is memory-mapped on read:
+    followers as int64, usernames as one block of newline-terminated UTF-8
+    with int64 row offsets. Files are appended chunk by chunk while the CSV
+    is parsed, so building takes no more memory than reading, and chunks are
+    sliced straight out of the files with no CSV parsing. meta.json records the size and mtime of the source CSV and
+    is written last; a cache whose metadata does not match the source is
+    rebuilt on the next read.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.logger = logging.getLogger(__name__)
+
+    def path_for(self, file_path: Path) -> Path:
+        return self.cache_dir / file_path.stem
+
+    def is_fresh(self, file_path: Path) -> bool:
+        """
+        Check that a complete cache exists for the current version of file_path
+        """
+        meta = self._load_meta(file_path)
+        if meta is None:
+            return False
+        return all(meta.get(key) == value for key, value in self._source_meta(file_path).items())
+
+    def ensure(self, file_path: Path, chunk_size: int = 50_000) -> bool:
+        """
+        Build the cache for file_path unless an up-to-date one exists
+        """
+        if self.is_fresh(file_path):
+            return True
+        return self.build(file_path, chunk_size)
+
+    def build(self, file_path: Path, chunk_size: int = 50_000) -> bool:
+        """
+        Parse the CSV once and store the cached columns in binary form
+        """
+        entry = self.path_for(file_path)
+        try:
+            source_meta = self._source_meta(file_path)
+
+            # Drop the old metadata first so a crash mid-build leaves no valid cache
+            if entry.exists():
+                shutil.rmtree(entry)
+            entry.mkdir(parents=True)
+
+            rows = 0
+            size = 0
+            with open(entry / "username.bin", "wb") as usernames, \
+                    open(entry / "username.offsets.bin", "wb") as offsets, \
+                    open(entry / "followersCount.bin", "wb") as followers:
+                offsets.write(np.zeros(1, dtype="int64").tobytes())
+
+                for chunk in pd.read_csv(file_path, usecols=CACHED_COLUMNS, chunksize=chunk_size, dtype={"username": str}):
+                    if chunk.empty:
+                        continue
+
+                    # One newline-terminated UTF-8 record per row
+                    names = chunk["username"].fillna("").str.replace("\n", " ", regex=False)
+                    data = ("\n".join(names) + "\n").encode("utf-8")
+                    ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1 + size
+
+                    usernames.write(data)
+                    offsets.write(ends.astype("int64").tobytes())
+                    followers.write(
+                        pd.to_numeric(chunk["followersCount"], errors="coerce").fillna(0).astype("int64")
+                        .to_numpy().tobytes()
+                    )
+                    rows += len(chunk)
+                    size += len(data)
+
+            meta = {**source_meta, "rows": rows}
+            atomic_write_text(entry / "meta.json", json.dumps(meta))
+
+            self.logger.info(f"Cached {meta['rows']} rows of {file_path.name}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error caching {file_path}: {str(e)}")
+            return False
+
+    def iter_chunks(self, file_path: Path, columns: List[str], chunk_size: int = 50_000) -> Iterator[pd.DataFrame]:
+        """
+        Yield the given cached columns of file_path in chunks
+        """
+        entry = self.path_for(file_path)
+        rows = self.rows(file_path)
+        if rows == 0:
+            return
+
+        dtypes = {"username": np.uint8, "followersCount": np.int64}
+        arrays = {name: np.memmap(entry / f"{name}.bin", dtype=dtypes[name], mode="r") for name in columns}
+        if "username" in arrays:
+            offsets = np.memmap(entry / "username.offsets.bin", dtype=np.int64, mode="r")
+
+        for start in range(0, rows, chunk_size):
+            stop = min(start + chunk_size, rows)
+            chunk = {}
+            for name, values in arrays.items():
+                if name == "username":
+                    # Split the chunk's slice of the blob in one go, dropping the last newline
+                    names = values[offsets[start]:offsets[stop] - 1].tobytes().decode("utf-8").split("\n")
+                    chunk[name] = pd.Series(names, dtype=str)
+                else:
+                    chunk[name] = pd.Series(np.asarray(values[start:stop]))
+            yield pd.DataFrame(chunk).set_axis(pd.RangeIndex(start, stop))
+
+    def rows(self, file_path: Path) -> int:
+        meta = self._load_meta(file_path)
+        return meta["rows"] if meta else 0
+
+    def _load_meta(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        meta_file = self.path_for(file_path) / "meta.json"
+        try:
+            if meta_file.exists():
+                with open(meta_file, encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error reading cache metadata for {file_path}: {str(e)}")
+        return None
+
+    @staticmethod
+    def _source_meta(file_path: Path) -> Dict[str, Any]:
+        stat = file_path.stat()
+        return {
+            "version": CACHE_VERSION,
+            "source": file_path.name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "columns": CACHED_COLUMNS,
+        }
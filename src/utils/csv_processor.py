@@ -1,70 +1,320 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import csv
+import heapq
 import logging
+import tempfile
+import tracemalloc
+
+from src.utils.column_cache import CACHE_DIR_NAME, CACHED_COLUMNS, ColumnCache
 
 logger = logging.getLogger(__name__)
 
-def process_category_files(output_file: str = "data/users.csv") -> bool:
+CATEGORY_DIR = "category"
+CHUNK_SIZE = 50_000
+
+# Scraper exports are named after the search keyword they were collected with.
+# Map those keywords to the categories used in message_templates.json
+CATEGORY_KEYWORDS = {
+    "پیج-لباس": "fashion",
+    "لباس زنانه": "fashion",
+    "لوازم خانگی": "home_decor",
+    "محصولات بهداشتی": "cosmetics",
+}
+
+# Files produced by extract_usernames.py live next to the raw exports
+DERIVED_FILE_PREFIX = "usernames_"
+
+OUTPUT_COLUMNS = ["username", "category", "status", "followersCount"]
+
+# Most run files open at once while merging; more runs are merged in passes
+MAX_MERGE_FAN_IN = 64
+
+
+class UsernameIndex:
+    """
+    Compact set of usernames stored as a sorted array of 64-bit hashes.
+
+    Uses 8 bytes per username instead of a full Python string, so it can
+    track millions of entries. A 64-bit collision is possible in theory but
+    negligible at the list sizes we deal with.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    @staticmethod
+    def hash_usernames(usernames: pd.Series) -> np.ndarray:
+        """
+        Hash a series of normalized usernames
+        """
+        return pd.util.hash_pandas_object(usernames, index=False).to_numpy()
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Return a boolean mask of hashes already present in the index
+        """
+        if len(self._hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool)
+
+        positions = np.searchsorted(self._hashes, hashes)
+        positions = np.minimum(positions, len(self._hashes) - 1)
+        return self._hashes[positions] == hashes
+
+    def add_new(self, usernames: pd.Series) -> np.ndarray:
+        """
+        Add usernames to the index and return a mask of the ones not seen before
+        """
+        hashes = self.hash_usernames(usernames)
+
+        # Drop duplicates inside the chunk, then those seen in earlier chunks
+        mask = ~pd.Series(hashes).duplicated().to_numpy()
+        mask &= ~self.contains(hashes)
+
+        new_hashes = np.sort(hashes[mask])
+        positions = np.searchsorted(self._hashes, new_hashes)
+        self._hashes = np.insert(self._hashes, positions, new_hashes)
+
+        return mask
+
+
+def discover_category_files(category_dir: str = CATEGORY_DIR) -> List[Tuple[Path, str]]:
+    """
+    Find scraper exports under category_dir and resolve their category
+    """
+    category_path = Path(category_dir)
+    if not category_path.is_dir():
+        logger.error(f"Category directory not found: {category_path}")
+        return []
+
+    files = []
+    for file_path in sorted(category_path.glob("*.csv")):
+        if file_path.name.startswith(DERIVED_FILE_PREFIX):
+            continue
+
+        category = next(
+            (name for keyword, name in CATEGORY_KEYWORDS.items() if file_path.name.startswith(keyword)),
+            None
+        )
+        if category is None:
+            logger.warning(f"Skipping {file_path}: no category matches its name")
+            continue
+
+        files.append((file_path, category))
+
+    return files
+
+
+def normalize_usernames(usernames: pd.Series) -> pd.Series:
+    """
+    Normalize usernames for comparison (trimmed, lowercase, without a leading @)
+    """
+    return usernames.astype(str).str.strip().str.lstrip("@").str.lower()
+
+
+def iter_category_chunks(
+    file_path: Path,
+    columns: List[str],
+    chunk_size: int = CHUNK_SIZE,
+    use_cache: bool = True
+) -> Iterator[pd.DataFrame]:
+    """
+    Read the given columns of a scraper export in bounded-size chunks
+
+    With use_cache, columns held by the export's column cache are read from
+    it (building or refreshing the cache first) instead of parsing the CSV.
+    """
+    if use_cache and set(columns) <= set(CACHED_COLUMNS):
+        cache = ColumnCache(file_path.parent / CACHE_DIR_NAME)
+        if cache.ensure(file_path, chunk_size):
+            yield from cache.iter_chunks(file_path, columns, chunk_size)
+            return
+
+    yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_size)
+
+
+def _write_sorted_run(df: pd.DataFrame, run_dir: Path, run_number: int) -> Path:
+    """
+    Write a chunk sorted by followers count to a temporary run file
+    """
+    run_path = run_dir / f"run_{run_number:05d}.csv"
+    df = df.sort_values("followersCount", ascending=False, kind="mergesort")
+    df[OUTPUT_COLUMNS].to_csv(run_path, index=False, header=False)
+    return run_path
+
+
+def _merge_runs(run_paths: List[Path], output_path: Path, header: bool) -> None:
+    """
+    K-way merge sorted run files into one file without loading them
+    """
+    run_files = [open(path, newline="", encoding="utf-8") for path in run_paths]
+    try:
+        readers = [csv.reader(f) for f in run_files]
+        merged = heapq.merge(*readers, key=lambda row: -int(row[3]))
+
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(OUTPUT_COLUMNS)
+            writer.writerows(merged)
+    finally:
+        for f in run_files:
+            f.close()
+
+
+def _merge_sorted_runs(
+    run_paths: List[Path],
+    output_path: Path,
+    run_dir: Path,
+    fan_in: int = MAX_MERGE_FAN_IN
+) -> None:
+    """
+    Merge sorted run files into the final output, at most fan_in at a time
+
+    While there are more runs than fan_in, consecutive groups are merged
+    into larger runs, which keeps the order of equal rows (first file wins).
+    """
+    merge_pass = 0
+    while len(run_paths) > fan_in:
+        merged_paths = []
+        for start in range(0, len(run_paths), fan_in):
+            group = run_paths[start:start + fan_in]
+            merged_path = run_dir / f"merge_{merge_pass:02d}_{len(merged_paths):05d}.csv"
+            _merge_runs(group, merged_path, header=False)
+            for path in group:
+                path.unlink()
+            merged_paths.append(merged_path)
+        run_paths = merged_paths
+        merge_pass += 1
+
+    _merge_runs(run_paths, output_path, header=True)
+
+
+def process_category_files(
+    output_file: str = "data/users.csv",
+    category_dir: str = CATEGORY_DIR,
+    chunk_size: int = CHUNK_SIZE,
+    measure_memory: bool = False,
+    suppression=None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
     """
     Process category CSV files and combine them into a single users.csv file
+    and return an ingestion summary (empty on failure)
+
+    Files are streamed in chunks, usernames are deduplicated across all files
+    (first occurrence wins) and the result is sorted by followers count with
+    an external merge sort, so memory use does not grow with the input size.
+    With measure_memory the peak traced allocation is included in the summary
+    as peak_mib (tracemalloc roughly doubles the run time, so it is off by
+    default). Users matched by
+    the optional SuppressionIndex are left out of the output. Exports are
+    read through their column cache unless use_cache is off.
     """
+    was_tracing = tracemalloc.is_tracing()
+    if measure_memory and not was_tracing:
+        tracemalloc.start()
+    if measure_memory:
+        tracemalloc.reset_peak()
+
     try:
-        # Category mappings
-        category_files = {
-            "fashion": "category/پیج-لباس 25 - dataset_instagram-scraper_2025-05-28_08-31-49-556.csv",
-            "home_decor": "category/لوازم خانگی 100 - dataset_instagram-scraper_2025-05-28_08-49-29-232.csv",
-            "cosmetics": "category/محصولات بهداشتی 100 - dataset_instagram-scraper_2025-05-28_08-39-56-760 (1).csv"
-        }
-
-        # Initialize an empty list to store all users
-        all_users = []
-
-        # Process each category file
-        for category, file_path in category_files.items():
-            try:
-                df = pd.read_csv(file_path)
-                
-                # Select only required columns and rename them
-                df = df[["username", "followersCount"]]
-                
-                # Add category and status columns
-                df["category"] = category
-                df["status"] = "pending"
-                
-                # Append to our list
-                all_users.append(df)
-                logger.info(f"Processed {file_path} with {len(df)} users")
-
-            except Exception as e:
-                logger.error(f"Error processing file {file_path}: {str(e)}")
-                continue
-
-        if not all_users:
-            logger.error("No data was processed from any file")
-            return False
-
-        # Combine all dataframes
-        final_df = pd.concat(all_users, ignore_index=True)
-
-        # Sort by followers count (descending)
-        final_df = final_df.sort_values("followersCount", ascending=False)
-
-        # Save to users.csv
-        output_path = Path(output_file)
-        output_path.parent.mkdir(exist_ok=True)
-        
-        # Select and reorder columns for final output
-        final_df = final_df[["username", "category", "status", "followersCount"]]
-        final_df.to_csv(output_file, index=False)
-
-        logger.info(f"Successfully created {output_file} with {len(final_df)} users")
-        return True
+        category_files = discover_category_files(category_dir)
+        if not category_files:
+            logger.error("No category files found to process")
+            return {}
+
+        index = UsernameIndex()
+        total_rows = 0
+        total_users = 0
+
+        with tempfile.TemporaryDirectory(prefix="category_runs_") as tmp_dir:
+            run_dir = Path(tmp_dir)
+            run_paths = []
+
+            # Kept rows are buffered across files until chunk_size of them are
+            # pending, so small exports do not each become their own run
+            buffered = []
+            buffered_rows = 0
+
+            # Process each category file
+            for file_path, category in category_files:
+                try:
+                    file_rows = 0
+                    file_users = 0
+
+                    for chunk in iter_category_chunks(
+                        file_path, ["username", "followersCount"], chunk_size, use_cache
+                    ):
+                        file_rows += len(chunk)
+
+                        chunk = chunk.dropna(subset=["username"])
+                        chunk["username"] = normalize_usernames(chunk["username"])
+                        chunk = chunk[chunk["username"] != ""]
+                        chunk = chunk[index.add_new(chunk["username"])]
+                        if suppression is not None:
+                            chunk = chunk[~suppression.mask(chunk["username"])]
+                        if chunk.empty:
+                            continue
+
+                        chunk["followersCount"] = pd.to_numeric(
+                            chunk["followersCount"], errors="coerce"
+                        ).fillna(0).astype("int64")
+
+                        # Add category and status columns
+                        chunk["category"] = category
+                        chunk["status"] = "pending"
+
+                        buffered.append(chunk)
+                        buffered_rows += len(chunk)
+                        file_users += len(chunk)
+
+                        if buffered_rows >= chunk_size:
+                            run_paths.append(_write_sorted_run(pd.concat(buffered), run_dir, len(run_paths)))
+                            buffered = []
+                            buffered_rows = 0
+
+                    total_rows += file_rows
+                    total_users += file_users
+                    logger.info(f"Processed {file_path} ({category}): {file_rows} rows, {file_users} new users")
+
+                except Exception as e:
+                    logger.error(f"Error processing file {file_path}: {str(e)}")
+                    continue
+
+            if buffered:
+                run_paths.append(_write_sorted_run(pd.concat(buffered), run_dir, len(run_paths)))
+
+            if not run_paths:
+                logger.error("No data was processed from any file")
+                return {}
+
+            # Save to users.csv
+            output_path = Path(output_file)
+            output_path.parent.mkdir(exist_ok=True)
+            _merge_sorted_runs(run_paths, output_path, run_dir)
+
+        logger.info(f"Successfully created {output_file} with {total_users} users from {total_rows} rows")
+        summary = {"output_file": output_file, "files": len(category_files), "rows": total_rows, "users": total_users}
+        if measure_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            summary["peak_mib"] = round(peak_memory / 1_048_576, 1)
+            logger.info(f"Peak memory during ingestion: {summary['peak_mib']} MiB")
+        return summary
 
     except Exception as e:
         logger.error(f"Error in process_category_files: {str(e)}")
-        return False
+        return {}
+
+    finally:
+        if measure_memory and not was_tracing:
+            tracemalloc.stop()
 
 if __name__ == "__main__":
     # Setup basic logging
     logging.basicConfig(level=logging.INFO)
-    process_category_files() 
\ No newline at end of file
+    process_category_files()
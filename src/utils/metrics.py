@@ -0,0 +1,163 @@
+import bisect
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.utils.atomic import atomic_write_text
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is +Inf)
+BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram; recording is a bisect and a few adds
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls in
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "min_ms": round(self.min, 3) if self.min is not None else None,
+            "max_ms": round(self.max, 3) if self.max is not None else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": self.counts,
+        }
+
+
+class Metrics:
+    """
+    In-process timing spans, latency histograms and error/event counters.
+
+    Meant to stay on all the time: a span costs two perf_counter calls and a
+    histogram update. Results are exported as JSON and Prometheus text at the
+    end of a run.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.events: Dict[str, int] = {}
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """
+        Time a block of code; exceptions are counted per stage and re-raised
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.error(stage, type(e).__name__)
+            raise
+        finally:
+            self.observe(stage, (time.perf_counter() - started) * 1000)
+
+    def observe(self, stage: str, value_ms: float) -> None:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(value_ms)
+
+    def error(self, stage: str, error_class: str) -> None:
+        key = (stage, error_class)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def event(self, name: str, count: int = 1) -> None:
+        self.events[name] = self.events.get(name, 0) + count
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "bucket_bounds_ms": BUCKETS_MS,
+            "stages": {stage: histogram.to_dict() for stage, histogram in sorted(self.histograms.items())},
+            "errors": [
+                {"stage": stage, "error": error_class, "count": count}
+                for (stage, error_class), count in sorted(self.errors.items())
+            ],
+            "events": dict(sorted(self.events.items())),
+        }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = [
+            "# HELP dm_stage_duration_seconds Time spent in each pipeline stage",
+            "# TYPE dm_stage_duration_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS_MS + ["+Inf"], histogram.counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound / 1000:g}"
+                lines.append(f'dm_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'dm_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.total / 1000:.6f}')
+            lines.append(f'dm_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines += ["# HELP dm_errors_total Errors raised per pipeline stage", "# TYPE dm_errors_total counter"]
+        for (stage, error_class), count in sorted(self.errors.items()):
+            lines.append(f'dm_errors_total{{stage="{stage}",error="{error_class}"}} {count}')
+
+        lines += ["# HELP dm_events_total Pipeline events", "# TYPE dm_events_total counter"]
+        for name, count in sorted(self.events.items()):
+            lines.append(f'dm_events_total{{event="{name}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_file: str = "logs/metrics.json", prometheus_file: Optional[str] = "logs/metrics.prom") -> None:
+        """
+        Atomically write the metrics as JSON and, optionally, Prometheus text
+        """
+        try:
+            outputs = [(Path(json_file), json.dumps(self.to_dict(), indent=2))]
+            if prometheus_file:
+                outputs.append((Path(prometheus_file), self.to_prometheus()))
+
+            for path, content in outputs:
+                atomic_write_text(path, content)
+
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Error exporting metrics: {str(e)}")
+
+
+# Process-wide registry used by the client and sender
+metrics = Metrics()
@@ -0,0 +1,19 @@
+import sqlite3
+from pathlib import Path
+from typing import Union
+
+
+def open_wal_connection(db_path: Union[str, Path], schema: str) -> sqlite3.Connection:
+    """
+    Open a SQLite database in WAL mode and make sure its schema exists
+
+    WAL lets readers run while a writer commits, and synchronous=NORMAL is
+    durable enough for local state that can be rebuilt.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
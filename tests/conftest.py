@@ -0,0 +1,70 @@
+import shutil
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# The fake instagrapi backend is shared with the benchmarks
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fake_instagram import FakeInstagramBackend
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch) -> Path:
+    """
+    Empty project layout (data/, logs/) with the real templates, used as cwd,
+    and settings that make runs instant and deterministic
+    """
+    (tmp_path / "data").mkdir()
+    (tmp_path / "logs").mkdir()
+    shutil.copy(ROOT / "data" / "message_templates.json", tmp_path / "data" / "message_templates.json")
+    monkeypatch.chdir(tmp_path)
+
+    for name, value in {
+        "IG_USERNAME": "tester",
+        "IG_PASSWORD": "secret",
+        "MAX_DAILY_MESSAGES": "100",
+        "MIN_DELAY_SECONDS": "0",
+        "MAX_DELAY_SECONDS": "0",
+        "RELOGIN_BACKOFF_SECONDS": "0",
+        "JOURNAL_FSYNC": "false",
+    }.items():
+        monkeypatch.setenv(name, value)
+    return tmp_path
+
+
+@pytest.fixture
+def fake_backend(monkeypatch) -> Callable[..., FakeInstagramBackend]:
+    """
+    Route every InstagramClient to a fake backend; call the fixture to swap
+    in a backend with other options (or another class) for the next client
+    """
+    from src.auth import instagram_client
+    from src.utils.metrics import metrics
+
+    metrics.reset()
+    backends: List[FakeInstagramBackend] = []
+
+    def use(backend_class=FakeInstagramBackend, **options) -> FakeInstagramBackend:
+        backends.append(backend_class(**options))
+        return backends[-1]
+
+    use()
+    monkeypatch.setattr(instagram_client, "Client", lambda: backends[-1])
+    return use
+
+
+@pytest.fixture
+def write_users(workdir) -> Callable[[Iterable[str]], Path]:
+    def write(usernames: Iterable[str]) -> Path:
+        path = workdir / "data" / "users.csv"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("username,category,status,followersCount\n")
+            f.writelines(f"{username},fashion,pending,100\n" for username in usernames)
+        return path
+
+    return write
@@ -0,0 +1,139 @@
+"""
+End-to-end send-messages runs against the fake backend: resuming continues
+at the next user and nobody is messaged twice.
+"""
+import csv
+from typing import List
+
+from typer.testing import CliRunner
+
+from fake_instagram import FakeInstagramBackend
+from main import app
+from src.data.user_store import UserStore
+from src.services.send_journal import SendJournal
+
+runner = CliRunner()
+
+USERS = [f"user_{i}" for i in range(7)]
+
+
+def send(*args: str):
+    return runner.invoke(app, ["send-messages", *args])
+
+
+def messaged() -> List[str]:
+    """
+    Usernames of every attempt in the send journal, in order
+    """
+    return [record["username"] for record in SendJournal(csv_file=None).iter_records()]
+
+
+def statuses() -> dict:
+    store = UserStore("data/users.db")
+    try:
+        return {user["username"]: user["status"] for user in store.iter_users()}
+    finally:
+        store.close()
+
+
+def last_run(run_id=None) -> dict:
+    """
+    The given run, or the most recent unfinished one
+    """
+    store = UserStore("data/users.db")
+    try:
+        return store.get_run(run_id)
+    finally:
+        store.close()
+
+
+class InterruptingBackend(FakeInstagramBackend):
+    """
+    Raises KeyboardInterrupt on the n-th send, like Ctrl+C mid-run
+    """
+
+    def __init__(self, interrupt_at: int, **options):
+        super().__init__(**options)
+        self.interrupt_at = interrupt_at
+
+    def direct_send(self, text, user_ids):
+        if self.calls["direct_send"] + 1 == self.interrupt_at:
+            self.calls["direct_send"] += 1
+            raise KeyboardInterrupt
+        return super().direct_send(text, user_ids)
+
+
+def test_paused_run_resumes_after_cursor(workdir, fake_backend, write_users, monkeypatch):
+    write_users(USERS)
+    monkeypatch.setenv("MAX_DAILY_MESSAGES", "3")
+
+    result = send()
+    assert result.exit_code == 0, result.output
+    assert messaged() == USERS[:3]
+    run = last_run()
+    assert run["status"] == "paused"
+    assert statuses()["user_2"] == "success" and statuses()["user_3"] == "pending"
+
+    monkeypatch.setenv("MAX_DAILY_MESSAGES", "100")
+    result = send("--resume")
+    assert result.exit_code == 0, result.output
+    assert messaged() == USERS
+    assert last_run(run["run_id"])["status"] == "completed"
+    assert set(statuses().values()) == {"success"}
+
+
+def test_interrupt_flushes_pending_statuses(workdir, fake_backend, write_users):
+    write_users(USERS)
+    fake_backend(InterruptingBackend, interrupt_at=4)
+
+    # The checkpoint batch (10) is larger than the 3 users sent before Ctrl+C
+    result = send("--checkpoint-every", "10")
+    assert result.exit_code == 130, result.output
+    assert messaged() == USERS[:3]
+    assert [statuses()[username] for username in USERS[:4]] == ["success", "success", "success", "pending"]
+    run = last_run()
+    assert run["status"] == "interrupted"
+    assert run["processed"] == 3
+
+    fake_backend()
+    result = send("--resume")
+    assert result.exit_code == 0, result.output
+    assert messaged() == USERS
+    assert len(set(messaged())) == len(messaged())
+
+
+def test_users_already_sent_are_never_messaged(workdir, fake_backend, write_users):
+    write_users(USERS)
+    with open("logs/sent_log.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "username", "category", "status", "error"])
+        writer.writerow(["2026-01-01 10:00:00", "USER_1", "fashion", "success", ""])
+        writer.writerow(["2026-01-01 10:01:00", "user_2", "fashion", "failed", "ClientError"])
+    with open("data/opt_out.txt", "w", encoding="utf-8") as f:
+        f.write("# asked not to be contacted\n@user_4\n")
+
+    result = send()
+    assert result.exit_code == 0, result.output
+
+    # A failed attempt may be retried; a success or an opt-out never
+    assert messaged() == ["user_0", "user_2", "user_3", "user_5", "user_6"]
+    assert statuses()["user_1"] == "suppressed"
+    assert statuses()["user_4"] == "suppressed"
+
+    result = send()
+    assert result.exit_code == 1
+    assert len(messaged()) == 5
+
+
+def test_users_removed_from_csv_are_not_messaged_on_resume(workdir, fake_backend, write_users, monkeypatch):
+    write_users(USERS)
+    monkeypatch.setenv("MAX_DAILY_MESSAGES", "2")
+    assert send().exit_code == 0
+
+    write_users([username for username in USERS if username != "user_4"])
+    monkeypatch.setenv("MAX_DAILY_MESSAGES", "100")
+    result = send("--resume")
+    assert result.exit_code == 0, result.output
+
+    assert "user_4" not in messaged()
+    assert messaged() == ["user_0", "user_1", "user_2", "user_3", "user_5", "user_6"]